@@ -0,0 +1,106 @@
+"""Asynchronous page fetching over one pooled, cookie-keeping connection."""
+import asyncio
+from typing import Dict, Iterable, List, Optional
+
+import aiohttp
+from yarl import URL
+
+from config import ASYNC_CONCURRENCY, COOKIE_JAR_FILE, HTTP_TIMEOUT
+from cookie_store import load_cookies, restore_cookies, save_cookies
+from http_cache import HttpCache
+from rate_limiter import rate_limiter
+
+
+class AsyncFetcher:
+    """
+    Fetch pages concurrently through a single long-lived aiohttp session.
+    Use as an async context manager; cookies are reloaded from and saved to
+    cookie_file so they survive between runs, and pages are revalidated
+    against the on-disk HTTP cache.
+    """
+
+    def __init__(self, headers: Dict, concurrency: int = ASYNC_CONCURRENCY, timeout: int = HTTP_TIMEOUT,
+                 cookie_file: Optional[str] = COOKIE_JAR_FILE, use_cache: bool = True):
+        self.headers = headers
+        self.http_cache = HttpCache() if use_cache else None
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.cookie_file = cookie_file
+        self.session = None
+        self._semaphore = None
+        self._warmed_up = False
+
+    async def __aenter__(self):
+        cookie_jar = aiohttp.CookieJar()
+        if self.cookie_file:
+            restore_cookies(cookie_jar, load_cookies(self.cookie_file))
+
+        connector = aiohttp.TCPConnector(limit=self.concurrency, ttl_dns_cache=300)
+        self.session = aiohttp.ClientSession(
+            headers=self.headers,
+            connector=connector,
+            cookie_jar=cookie_jar,
+            timeout=aiohttp.ClientTimeout(total=self.timeout)
+        )
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if self.cookie_file:
+            save_cookies(self.cookie_file, self.session.cookie_jar)
+        await self.session.close()
+        self.session = None
+
+    def has_cookies_for(self, url: str) -> bool:
+        """Return True if the jar holds an unexpired cookie for the URL."""
+        return bool(self.session.cookie_jar.filter_cookies(URL(url)))
+
+    async def warm_up(self, url: str) -> None:
+        """Visit the homepage so the session picks up cookies, unless it already has them."""
+        if self._warmed_up or self.has_cookies_for(url):
+            return
+        try:
+            await self.fetch_text(url)
+            print("Successfully connected to main page")
+        except aiohttp.ClientError as e:
+            print(f"Warm-up request failed: {e}")
+        self._warmed_up = True
+
+    async def fetch_text(self, url: str, retries: int = 3) -> str:
+        """Fetch a page body with retries and exponential backoff."""
+        for attempt in range(retries):
+            try:
+                conditional_headers = self.http_cache.conditional_headers(url) if self.http_cache else {}
+                await rate_limiter.wait_async(url)
+                async with self._semaphore:
+                    async with self.session.get(url, headers=conditional_headers) as response:
+                        if response.status == 304:
+                            cached = self.http_cache.load(url) if self.http_cache else None
+                            if cached is not None:
+                                return cached
+                            raise aiohttp.ClientError(f"Cached copy of {url} is missing")
+                        response.raise_for_status()
+                        body = await response.read()
+                        html = body.decode(response.charset or 'utf-8', errors='replace')
+                        if self.http_cache:
+                            self.http_cache.store(url, response.headers, html)
+                        return html
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt == retries - 1:
+                    raise
+                print(f"Error fetching {url}: {e}. Retrying...")
+                await asyncio.sleep(2 ** attempt)  # Exponential backoff
+
+    async def fetch_all(self, urls: Iterable[str]) -> List[Optional[str]]:
+        """Fetch several pages concurrently; failed pages come back as None."""
+        urls = list(urls)
+        results = await asyncio.gather(*(self.fetch_text(url) for url in urls), return_exceptions=True)
+
+        pages = []
+        for url, result in zip(urls, results):
+            if isinstance(result, Exception):
+                print(f"Error fetching {url}: {result}")
+                pages.append(None)
+            else:
+                pages.append(result)
+        return pages
@@ -0,0 +1,98 @@
+"""
+Micro-benchmark: parse + extract time per couponscorpion page,
+old multi-parser debug parsing vs. the targeted single-pass extraction.
+
+Usage: python benchmark_extract.py [page.html ...]
+Without arguments a synthetic article page is used.
+"""
+import contextlib
+import io
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+from html_extract import FAST_PARSER, extract_course_url, extract_search_results
+
+
+def synthetic_page(posts: int = 40) -> str:
+    """Build a page shaped like a couponscorpion article/search page."""
+    sidebar = ''.join(
+        f'<li class="widget-item item-{i}"><a class="title" href="/post-{i}/">Related post {i}</a>'
+        f'<span class="meta">December {i % 28 + 1}, 2024</span></li>'
+        for i in range(posts * 5)
+    )
+    results = ''.join(
+        f'<article class="post"><h2 class="font130 mt0 mb10 mobfont120 lineheight25">'
+        f'<a href="https://couponscorpion.com/design/course-{i}/">Course {i}</a>'
+        f'<span class="date_meta">December {i % 28 + 1}, 2024</span></h2>'
+        f'<div class="excerpt"><p>{"Lorem ipsum dolor sit amet. " * 10}</p></div></article>'
+        for i in range(posts)
+    )
+    return (
+        '<html><head><title>Coupon</title>'
+        + '<script>var x = 1;</script>' * 20
+        + '</head><body><div class="main">'
+        + results
+        + '<div class="rh_button_wrapper"><a href="https://www.udemy.com/course/demo/?couponCode=ABC">Get</a></div>'
+        + f'</div><aside><ul>{sidebar}</ul></aside></body></html>'
+    )
+
+
+def legacy_parse_and_extract(html: str):
+    """The previous CouponScorpionScraper.get_page parsing plus extraction."""
+    for parser in ['lxml', 'html.parser', 'html5lib']:
+        try:
+            soup = BeautifulSoup(html, parser)
+            print(f"\nTrying parser: {parser}")
+            if soup.find('body'):
+                print(f"Successfully parsed with {parser}")
+                print("\nPage Structure:")
+                tags = set(tag.name for tag in soup.find_all())
+                classes = set(cls for tag in soup.find_all() if tag.get('class') for cls in tag.get('class'))
+                print("Available tags:", tags)
+                print("\nAvailable classes:", classes)
+                print("\nPage preview:")
+                print(html[:500])
+                break
+        except Exception as e:
+            print(f"Parser {parser} failed: {e}")
+
+    articles = soup.find_all('h2', class_=['font130', 'mt0', 'mb10', 'mobfont120', 'lineheight25'])
+    button_wrapper = soup.find('div', class_='rh_button_wrapper')
+    return len(articles), button_wrapper.find('a').get('href') if button_wrapper else None
+
+
+def targeted_parse_and_extract(html: str):
+    """Single-pass extraction used by CouponScorpionScraper now."""
+    return len(extract_search_results(html)), extract_course_url(html)
+
+
+def time_per_page(func, html: str, rounds: int) -> float:
+    """Average milliseconds per call, with printing captured off-screen."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        func(html)  # warm-up
+        start = time.perf_counter()
+        for _ in range(rounds):
+            func(html)
+        elapsed = time.perf_counter() - start
+    return elapsed / rounds * 1000
+
+
+def main():
+    pages = [open(path, encoding='utf-8').read() for path in sys.argv[1:]] or [synthetic_page()]
+    rounds = 20
+
+    print(f"Parser used by targeted extraction: {FAST_PARSER}")
+    for index, html in enumerate(pages, 1):
+        # Both paths must extract the same data before their timings are compared
+        with contextlib.redirect_stdout(io.StringIO()):
+            assert targeted_parse_and_extract(html) == legacy_parse_and_extract(html)
+        legacy = time_per_page(legacy_parse_and_extract, html, rounds)
+        targeted = time_per_page(targeted_parse_and_extract, html, rounds)
+        print(f"Page {index} ({len(html) // 1024} KiB): "
+              f"legacy {legacy:.2f} ms, targeted {targeted:.2f} ms, speed-up x{legacy / targeted:.1f}")
+
+
+if __name__ == "__main__":
+    main()
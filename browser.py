@@ -0,0 +1,151 @@
+"""Chrome WebDriver construction shared by the scraper and its worker pool."""
+import os
+import platform
+from functools import lru_cache
+
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from webdriver_manager.chrome import ChromeDriverManager
+
+from config import BLOCKED_URL_PATTERNS, BROWSER_LEAN_MODE
+
+
+def build_chrome_options(headless: bool = False, lean: bool = False) -> webdriver.ChromeOptions:
+    """
+    Build the Chrome options used by every scraper browser.
+    Lean mode runs headless, skips images/media and returns once the DOM is ready.
+    """
+    chrome_options = webdriver.ChromeOptions()
+    chrome_options.add_argument('--ignore-certificate-errors')
+    chrome_options.add_argument('--ignore-ssl-errors')
+
+    # Try to locate Chrome executable
+    chrome_paths = [
+        r"C:\Program Files\Google\Chrome\Application\chrome.exe",
+        r"C:\Program Files (x86)\Google\Chrome\Application\chrome.exe",
+        r"%LOCALAPPDATA%\Google\Chrome\Application\chrome.exe"
+    ]
+
+    chrome_binary = None
+    for path in chrome_paths:
+        expanded_path = os.path.expandvars(path)
+        if os.path.exists(expanded_path):
+            chrome_binary = expanded_path
+            break
+
+    if chrome_binary:
+        print(f"Found Chrome binary at: {chrome_binary}")
+        chrome_options.binary_location = chrome_binary
+    else:
+        print("Warning: Could not find Chrome binary in standard locations")
+
+    # Add required Chrome options
+    chrome_options.add_argument('--no-sandbox')
+    chrome_options.add_argument('--disable-dev-shm-usage')
+    chrome_options.add_argument('--disable-gpu')
+    chrome_options.add_argument('--disable-infobars')
+    chrome_options.add_argument('--disable-extensions')
+    chrome_options.add_argument('--disable-software-rasterizer')
+
+    if headless or lean:
+        chrome_options.add_argument('--headless=new')
+        chrome_options.add_argument('--window-size=1920,1080')
+
+    if lean:
+        # Don't wait for images, stylesheets and iframes before handing the page back
+        chrome_options.page_load_strategy = 'eager'
+        chrome_options.add_argument('--blink-settings=imagesEnabled=false')
+        chrome_options.add_argument('--mute-audio')
+        chrome_options.add_argument('--autoplay-policy=user-gesture-required')
+        chrome_options.add_experimental_option('prefs', {
+            'profile.managed_default_content_settings.images': 2,
+            'profile.managed_default_content_settings.media_stream': 2,
+            'profile.managed_default_content_settings.notifications': 2,
+        })
+
+    return chrome_options
+
+
+def block_heavy_requests(driver: webdriver.Chrome) -> None:
+    """Block images, media, fonts and ad/analytics hosts through the DevTools protocol."""
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': BLOCKED_URL_PATTERNS})
+    except Exception as e:
+        print(f"Could not enable request blocking: {str(e)}")
+
+
+@lru_cache(maxsize=1)
+def get_chromedriver_path() -> str:
+    """Locate (and download if needed) the chromedriver executable, once per process."""
+    # Use specific ChromeDriver version matching your Chrome
+    driver_manager = ChromeDriverManager()
+    driver_path = driver_manager.install()
+
+    # Ensure we're using the correct chromedriver executable
+    if driver_path.endswith('THIRD_PARTY_NOTICES.chromedriver'):
+        driver_dir = os.path.dirname(driver_path)
+        possible_drivers = [
+            os.path.join(driver_dir, 'chromedriver.exe'),
+            os.path.join(driver_dir, 'chromedriver-win32', 'chromedriver.exe'),
+            os.path.join(driver_dir, 'chromedriver-win64', 'chromedriver.exe')
+        ]
+
+        for possible_driver in possible_drivers:
+            if os.path.exists(possible_driver):
+                driver_path = possible_driver
+                break
+
+    return driver_path
+
+
+def create_chrome_driver(headless: bool = False, lean: bool = BROWSER_LEAN_MODE) -> webdriver.Chrome:
+    """Start a configured Chrome WebDriver."""
+    chrome_options = build_chrome_options(headless, lean)
+
+    try:
+        print("Starting WebDriver setup...")
+
+        driver_path = get_chromedriver_path()
+        print(f"Using ChromeDriver at: {driver_path}")
+
+        service = Service(executable_path=driver_path)
+        print("Service created successfully")
+
+        print("Initializing Chrome WebDriver...")
+        driver = webdriver.Chrome(service=service, options=chrome_options)
+
+        driver.set_page_load_timeout(30)
+        driver.implicitly_wait(10)
+
+        if lean:
+            block_heavy_requests(driver)
+
+        print("WebDriver setup completed successfully!")
+        return driver
+
+    except Exception as e:
+        error_msg = str(e)
+        print(f"Error setting up WebDriver: {error_msg}")
+
+        # Get system information for debugging
+        system_info = f"""
+        System Information:
+        - OS: {platform.system()} {platform.version()}
+        - Python: {platform.python_version()}
+        - Architecture: {platform.architecture()[0]}
+        """
+
+        troubleshooting_msg = f"""
+        Troubleshooting steps:
+        1. Make sure Google Chrome is installed and up to date
+        2. Try these steps:
+           a. Uninstall Chrome and reinstall the latest version
+           b. Run these commands:
+              - pip uninstall selenium webdriver-manager
+              - pip install selenium webdriver-manager --upgrade
+           c. Delete the .wdm folder in your user directory
+        3. System Information: {system_info}
+        """
+
+        raise Exception(f"Could not initialize WebDriver: {error_msg}\n{troubleshooting_msg}")
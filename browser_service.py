@@ -0,0 +1,129 @@
+"""Long-lived service that keeps warm Chrome drivers between scraping runs."""
+import threading
+from typing import Dict, List
+
+import psutil
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from browser import create_chrome_driver
+from config import BASE_URL, BROWSER_MAX_MEMORY_MB, BROWSER_MAX_PAGES, BROWSER_SERVICE_SIZE
+
+
+def accept_consent(driver, timeout: int = 10) -> bool:
+    """Click the cookie consent button if it shows up."""
+    try:
+        consent_button = WebDriverWait(driver, timeout).until(
+            EC.presence_of_element_located((By.CLASS_NAME, "fc-button-label"))
+        )
+        consent_button.click()
+        # Wait for popup to close
+        WebDriverWait(driver, 5).until(EC.invisibility_of_element(consent_button))
+        return True
+    except Exception as e:
+        print(f"No consent button found or error clicking it: {str(e)}")
+        return False
+
+
+def driver_memory_mb(driver) -> float:
+    """Memory used by a driver's browser in MB: the RSS of chromedriver and its Chrome processes."""
+    process = psutil.Process(driver.service.process.pid)
+    processes = [process] + process.children(recursive=True)
+    return sum(p.memory_info().rss for p in processes) / (1024 * 1024)
+
+
+class BrowserService:
+    """
+    Hand out warm drivers (consent already accepted) and take them back.
+    Drivers are recycled after max_pages page loads or above max_memory_mb.
+    """
+
+    def __init__(self, size: int = BROWSER_SERVICE_SIZE, max_pages: int = BROWSER_MAX_PAGES,
+                 max_memory_mb: int = BROWSER_MAX_MEMORY_MB, warm_url: str = BASE_URL):
+        self.size = size
+        self.max_pages = max_pages
+        self.max_memory_mb = max_memory_mb
+        self.warm_url = warm_url
+        self._idle: List = []
+        self._pages: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def _start_driver(self):
+        """Start a driver, count its page loads and accept the site's consent popup."""
+        driver = create_chrome_driver()
+        original_get = driver.get
+        pages = self._pages
+        pages[id(driver)] = 0
+
+        def counted_get(url):
+            pages[id(driver)] = pages.get(id(driver), 0) + 1
+            return original_get(url)
+
+        driver.get = counted_get
+        driver.get(self.warm_url)
+        accept_consent(driver)
+        return driver
+
+    def _is_alive(self, driver) -> bool:
+        try:
+            driver.current_url
+            return True
+        except Exception:
+            return False
+
+    def _is_healthy(self, driver) -> bool:
+        if self._pages.get(id(driver), 0) >= self.max_pages:
+            print(f"Recycling driver after {self._pages[id(driver)]} pages")
+            return False
+        try:
+            memory = driver_memory_mb(driver)
+        except (psutil.Error, AttributeError):
+            # No process to measure (e.g. a remote driver): fall back to a liveness check
+            return self._is_alive(driver)
+        if memory > self.max_memory_mb:
+            print(f"Recycling driver using {memory:.0f} MB")
+            return False
+        return True
+
+    def _quit(self, driver) -> None:
+        self._pages.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception as e:
+            print(f"Error closing driver: {str(e)}")
+
+    def acquire(self):
+        """Return a warm driver, starting one only when none is idle."""
+        while True:
+            with self._lock:
+                driver = self._idle.pop() if self._idle else None
+            if driver is None:
+                return self._start_driver()
+            if self._is_alive(driver):
+                return driver
+            self._quit(driver)
+
+    def release(self, driver) -> None:
+        """Take a driver back, recycling it if it is worn out."""
+        if not self._is_healthy(driver):
+            self._quit(driver)
+            return
+
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append(driver)
+                return
+        self._quit(driver)
+
+    def warm_up(self, count: int = 1) -> None:
+        """Start drivers ahead of the next run."""
+        for _ in range(count):
+            self.release(self._start_driver())
+
+    def close(self) -> None:
+        """Quit every idle driver."""
+        with self._lock:
+            drivers, self._idle = self._idle, []
+        for driver in drivers:
+            self._quit(driver)
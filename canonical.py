@@ -0,0 +1,37 @@
+"""One canonical key per Udemy course and coupon, whichever site the link came from."""
+from typing import Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from link_resolver import unwrap_affiliate_url
+
+
+def course_slug(url: str) -> Optional[str]:
+    """Return the slug of a Udemy course URL (udemy.com/course/<slug>/)."""
+    parts = [part for part in urlparse(url).path.split('/') if part]
+    if 'course' in parts and parts.index('course') + 1 < len(parts):
+        return parts[parts.index('course') + 1]
+    return None
+
+
+def coupon_from_url(url: str) -> Optional[str]:
+    """Return the couponCode parameter of a course link, affiliate-wrapped or not."""
+    query = parse_qs(urlparse(unwrap_affiliate_url(url or '')).query)
+    for param, values in query.items():
+        if param.lower() == 'couponcode' and values[0]:
+            return values[0]
+    return None
+
+
+def canonical_offer(url: str, coupon_code: Optional[str] = None) -> Tuple[str, str]:
+    """
+    Normalize a course link to (course slug, coupon code).
+    Links that are not Udemy course pages fall back to the bare URL.
+    """
+    url = unwrap_affiliate_url(url or '')
+    course = course_slug(url) or url.split('?')[0].split('#')[0].rstrip('/')
+    return course.lower(), (coupon_code or coupon_from_url(url) or '').upper()
+
+
+def offer_key(url: str, coupon_code: Optional[str] = None) -> str:
+    """Canonical key of a course offer, "slug|COUPON"."""
+    return '|'.join(canonical_offer(url, coupon_code))
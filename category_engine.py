@@ -0,0 +1,134 @@
+"""The one category engine shared by every code path, built once from config.CATEGORIES."""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from config import CATEGORIES, CATEGORY_MEMO_FILE, CATEGORY_MEMO_MAX_ENTRIES, CATEGORY_MEMO_SIZE
+from keyword_matcher import freeze_categories
+from utils import categorize_course
+
+
+def normalize_text(text: Optional[str]) -> str:
+    """Lowercase and collapse whitespace, so the same title always gets the same answer."""
+    return ' '.join((text or '').lower().split())
+
+
+def categories_fingerprint(categories: Dict) -> str:
+    """Hash of the category names and keywords, in order; any change gives a new fingerprint."""
+    return hashlib.sha1(json.dumps(freeze_categories(categories)).encode('utf-8')).hexdigest()
+
+
+class CategoryMemo:
+    """
+    Categorization results kept on disk between runs, keyed by a hash of the
+    normalized title and description. Entries made under another category
+    table are ignored, and the least recently used ones are dropped past max_entries.
+    Scraper workers share the memo, so every access holds the lock.
+    """
+
+    def __init__(self, fingerprint: str, path: str = CATEGORY_MEMO_FILE,
+                 max_entries: int = CATEGORY_MEMO_MAX_ENTRIES):
+        self.fingerprint = fingerprint
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self.entries = self.load()
+        self.dirty = False
+
+    @staticmethod
+    def key(title: str, description: str) -> str:
+        return hashlib.sha1(f"{title}\n{description}".encode('utf-8')).hexdigest()
+
+    def load(self) -> 'OrderedDict[str, Dict]':
+        """Load the stored results that match the current category table, oldest first."""
+        entries = OrderedDict()
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    stored = json.load(f)
+                for key, entry in stored.items():
+                    if entry.get('fingerprint') == self.fingerprint:
+                        entries[key] = entry
+            except (json.JSONDecodeError, AttributeError):
+                print("Category memo corrupted, starting fresh")
+        return entries
+
+    def get(self, key: str) -> Optional[Tuple[str, int, Tuple[str, ...]]]:
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            self.entries.move_to_end(key)
+            self.dirty = True
+        category, score, keywords = entry['result']
+        return category, score, tuple(keywords)
+
+    def put(self, key: str, result: Tuple[str, int, Tuple[str, ...]]) -> None:
+        category, score, keywords = result
+        entry = {'fingerprint': self.fingerprint, 'result': [category, score, list(keywords)]}
+        with self._lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+            self.dirty = True
+
+    def save(self) -> None:
+        """Write the memo back, least recently used first, if anything changed."""
+        with self._lock:
+            if not self.dirty:
+                return
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f, ensure_ascii=False)
+            self.dirty = False
+
+
+class CategoryEngine:
+    """
+    Categorize courses with the precompiled keyword matcher for one category table.
+    Results are memoized per normalized title and description, in memory and on disk.
+    """
+
+    def __init__(self, categories: Dict = CATEGORIES, memo_size: int = CATEGORY_MEMO_SIZE,
+                 memo_file: Optional[str] = CATEGORY_MEMO_FILE):
+        self.categories = categories
+        self.fingerprint = categories_fingerprint(categories)
+        self._disk_memo = CategoryMemo(self.fingerprint, memo_file) if memo_file else None
+        self._memo = lru_cache(maxsize=memo_size)(self._score)
+
+    def _score(self, title: str, description: str) -> Tuple[str, int, Tuple[str, ...]]:
+        key = CategoryMemo.key(title, description)
+        if self._disk_memo is not None:
+            result = self._disk_memo.get(key)
+            if result is not None:
+                return result
+
+        category, score, keywords = categorize_course(title, description, self.categories)
+        result = (category, score, tuple(keywords))
+        if self._disk_memo is not None:
+            self._disk_memo.put(key, result)
+        return result
+
+    def categorize(self, title: str, description: str = '') -> Tuple[str, int, List[str]]:
+        """Return (category, confidence_score, matching_keywords) like categorize_course."""
+        category, score, keywords = self._memo(normalize_text(title), normalize_text(description))
+        return category, score, list(keywords)
+
+    def category_of(self, title: str, description: str = '') -> Optional[str]:
+        """Return the best category name, or None when no keyword matches."""
+        category, score, _ = self.categorize(title, description)
+        return category if score > 0 else None
+
+    def save(self) -> None:
+        """Persist the results memoized during this run."""
+        if self._disk_memo is not None:
+            self._disk_memo.save()
+
+
+# Shared by the scrapers and the message pipeline
+category_engine = CategoryEngine()
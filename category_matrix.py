@@ -0,0 +1,159 @@
+"""Batch categorization: a whole batch's term matrix times one category weight matrix."""
+from bisect import bisect_right
+from functools import lru_cache
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from keyword_matcher import KeywordMatcher, freeze_categories
+
+
+class CategoryMatrix:
+    """
+    Category weights for every term a course can hit: a keyword found anywhere (3),
+    a keyword found in the title (2) and a keyword word present as a whole word
+    (1 for each keyword containing it). A batch's 0/1 term matrix multiplied by
+    these weights gives the same scores as categorize_course, for every course at once.
+    """
+
+    def __init__(self, categories: Dict):
+        self.matcher = KeywordMatcher(categories)
+        self.names = [category for category, _, _ in self.matcher.categories]
+
+        # One column per (category, keyword) position, in config order
+        self.keyword_columns: Dict[str, List[int]] = {}
+        self.column_keywords: List[str] = []
+        self.category_columns: List[Tuple[int, int]] = []
+        for _, keywords, _ in self.matcher.categories:
+            first = len(self.column_keywords)
+            for keyword in keywords:
+                self.keyword_columns.setdefault(keyword, []).append(len(self.column_keywords))
+                self.column_keywords.append(keyword)
+            self.category_columns.append((first, len(self.column_keywords)))
+
+        self.vocabulary = sorted(self.matcher.word_index)
+        self.word_ids = {word: index for index, word in enumerate(self.vocabulary)}
+        self.title_offset = len(self.column_keywords)
+        self.word_offset = 2 * len(self.column_keywords)
+
+        self.weights = np.zeros((self.word_offset + len(self.vocabulary), len(self.names)), dtype=np.int64)
+        column = 0
+        for cat_index, (_, keywords, _) in enumerate(self.matcher.categories):
+            for _ in keywords:
+                self.weights[column, cat_index] = 3
+                self.weights[self.title_offset + column, cat_index] = 2
+                column += 1
+        for word, positions in self.matcher.word_index.items():
+            for cat_index, _ in positions:
+                self.weights[self.word_offset + self.word_ids[word], cat_index] += 1
+
+    def term_matrix(self, titles: Sequence[str], descriptions: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return the (row, column) coordinates of the batch's non-zero terms,
+        sorted by row and then column. Building it dominates the batch's cost.
+        """
+        _check_batch(titles, descriptions)
+        texts = [(title + ' ' + description).lower() for title, description in zip(titles, descriptions)]
+        title_lowers = [title.lower() for title in titles]
+        row_parts, column_parts = [], []
+
+        # One column at a time, each a C-level substring search over the whole batch joined
+        # together; keywords never span the newline between two texts
+        for source, offset in ((texts, 0), (title_lowers, self.title_offset)):
+            for keyword, rows in _rows_containing(source, self.keyword_columns).items():
+                for column in self.keyword_columns[keyword]:
+                    row_parts.append(rows)
+                    column_parts.append(np.full(len(rows), column + offset))
+
+        vocabulary, word_ids = self.matcher.word_index.keys(), self.word_ids
+        word_hits = [vocabulary & set(text.split()) for text in texts]
+        row_parts.append(np.repeat(np.arange(len(texts)), [len(words) for words in word_hits]))
+        column_parts.append(np.array([word_ids[word] for words in word_hits for word in words], dtype=np.int64)
+                            + self.word_offset)
+
+        width = self.weights.shape[0]
+        cells = np.concatenate(row_parts).astype(np.int64) * width + np.concatenate(column_parts)
+        cells.sort()
+        return cells // width, cells % width
+
+    def categorize(self, titles: Sequence[str], descriptions: Sequence[str]) -> List[Tuple[str, int, List[str]]]:
+        """Return (category, confidence_score, matching_keywords) for every course in the batch."""
+        _check_batch(titles, descriptions)
+        count = len(titles)
+        if not self.names:
+            return [('other', 0, []) for _ in range(count)]
+        if not count:
+            return []
+        rows, columns = self.term_matrix(titles, descriptions)
+
+        # Sparse term matrix times the weight matrix
+        scores = np.zeros((count, len(self.names)), dtype=np.int64)
+        np.add.at(scores, rows, self.weights[columns])
+
+        # argmax keeps the first category on ties, like the stable sort in categorize_course
+        best = scores.argmax(axis=1)
+        best_scores = scores[np.arange(count), best]
+
+        # Keywords behind the winning category: its keyword columns (in config order),
+        # then the words of its keywords
+        winner = best[rows]
+        first = np.array([first for first, _ in self.category_columns], dtype=np.int64)[winner]
+        last = np.array([last for _, last in self.category_columns], dtype=np.int64)[winner]
+        exact = (columns >= first) & (columns < last)
+        exact_keywords = np.array(self.column_keywords, dtype=object)[columns[exact]].tolist()
+        exact_bounds = np.searchsorted(rows[exact], np.arange(count + 1)).tolist()
+        word = (columns >= self.word_offset) & (self.weights[columns, winner] > 0)
+        word_hits = np.array(self.vocabulary, dtype=object)[columns[word] - self.word_offset].tolist()
+        word_bounds = np.searchsorted(rows[word], np.arange(count + 1)).tolist()
+
+        results = []
+        for row, (category, score) in enumerate(zip(best.tolist(), best_scores.tolist())):
+            if score <= 0:
+                results.append(('other', 0, []))
+                continue
+            matched = exact_keywords[exact_bounds[row]:exact_bounds[row + 1]]
+            words = set(word_hits[word_bounds[row]:word_bounds[row + 1]])
+            for kw_words in self.matcher.categories[category][2] if words else ():
+                common = kw_words & words
+                if len(common) > 1 and len(words) <= len(kw_words):
+                    # Set order depends on which operand is iterated; match categorize_course exactly
+                    common = kw_words & set((titles[row] + ' ' + descriptions[row]).lower().split())
+                matched.extend(list(common))
+            results.append((self.names[category], score, matched))
+        return results
+
+
+def _check_batch(titles: Sequence[str], descriptions: Sequence[str]) -> None:
+    if len(titles) != len(descriptions):
+        raise ValueError(f"Got {len(titles)} titles but {len(descriptions)} descriptions")
+
+
+def _rows_containing(texts: Sequence[str], keywords) -> Dict[str, np.ndarray]:
+    """Return, for every keyword, the indexes of the texts that contain it."""
+    starts = np.cumsum([0] + [len(text) + 1 for text in texts[:-1]], dtype=np.int64).tolist()
+    joined = '\n'.join(texts)
+    find = joined.find
+    rows_by_keyword = {}
+    for keyword in keywords:
+        if not keyword:
+            rows_by_keyword[keyword] = np.arange(len(texts))
+            continue
+        rows = []
+        position = find(keyword)
+        while position != -1:
+            row = bisect_right(starts, position) - 1
+            rows.append(row)
+            # One hit per text is enough; carry on from the next text
+            position = find(keyword, starts[row + 1]) if row + 1 < len(starts) else -1
+        rows_by_keyword[keyword] = np.array(rows, dtype=np.int64)
+    return rows_by_keyword
+
+
+@lru_cache(maxsize=8)
+def _compiled(frozen: Tuple) -> CategoryMatrix:
+    return CategoryMatrix({category: {'keywords': list(keywords)} for category, keywords in frozen})
+
+
+def get_category_matrix(categories: Dict) -> CategoryMatrix:
+    """Return the weight matrix for a category table, building it only once."""
+    return _compiled(freeze_categories(categories))
@@ -1,8 +1,16 @@
 """Configuration settings for the coupon scraper."""
+import os
 
 # Scraping settings
 BASE_URL = "https://www.real.discount"
-RATE_LIMIT_DELAY = 2  # seconds between requests
+RATE_LIMIT_DELAY = 2  # seconds between requests to a host without its own limit
+RATE_LIMIT_BURST = 3  # requests a host may receive back to back
+LISTING_PAGE_URL = BASE_URL + "/?page={page}"  # paginated listing for the HTTP path
+HTTP_TIMEOUT = 15  # seconds
+ASYNC_CONCURRENCY = 8  # simultaneous requests on the async connection pool
+COUPONSCORP_MAX_SEARCH_PAGES = 5  # search result pages to walk when no high-water mark is hit
+DEBUG_HTML_DUMPS = os.getenv('DEBUG_HTML_DUMPS') == '1'  # print the tag/class structure of every parsed page
+JS_ONLY_MIN_TEXT_LENGTH = 50  # fewer visible words than this means the page needs JavaScript
 
 # Category mappings with WhatsApp group numbers
 CATEGORIES = {
@@ -71,6 +79,9 @@ CATEGORIES = {
         ]
     }
 }
+CATEGORY_MEMO_SIZE = 4096  # categorization results kept in memory per normalized title
+CATEGORY_MEMO_FILE = "cache/category_memo.json"  # categorization results kept across runs
+CATEGORY_MEMO_MAX_ENTRIES = 50000  # least recently used results are dropped beyond this
 
 # Message template for WhatsApp
 MESSAGE_TEMPLATE = """🎓 *{title}*
@@ -105,10 +116,54 @@ SCHEDULE_INTERVAL = 24  # hours
 # Selenium settings
 SELENIUM_TIMEOUT = 10  # seconds
 SCROLL_PAUSE_TIME = 1  # seconds
+DRIVER_POOL_SIZE = min(4, os.cpu_count() or 1)  # headless browsers extracting offer pages in parallel
+BROWSER_SERVICE_SIZE = DRIVER_POOL_SIZE + 1  # warm drivers kept between scheduled runs
+BROWSER_MAX_PAGES = 200  # page loads before a warm driver is recycled
+BROWSER_MAX_MEMORY_MB = 1024  # memory above which a warm driver is recycled
+BROWSER_LEAN_MODE = os.getenv('BROWSER_LEAN_MODE', '0') == '1'  # opt-in: headless, eager loads, heavy requests blocked
+
+# Requests blocked in lean mode (DevTools Network.setBlockedURLs patterns)
+BLOCKED_URL_PATTERNS = [
+    # Images, media and fonts
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.svg', '*.ico', '*.avif',
+    '*.mp4', '*.webm', '*.mp3', '*.woff', '*.woff2', '*.ttf', '*.otf',
+    # Ads and analytics
+    '*doubleclick.net*', '*googlesyndication.com*', '*google-analytics.com*',
+    '*googletagmanager.com*', '*googletagservices.com*', '*adservice.google.*',
+    '*facebook.net*', '*connect.facebook.com*', '*hotjar.com*', '*amazon-adsystem.com*',
+    '*taboola.com*', '*outbrain.com*', '*criteo.com*', '*scorecardresearch.com*',
+]
 
 # File paths
 CACHE_FILE = "cache/processed_courses.json"
+COOKIE_JAR_FILE = "cache/cookies.json"
+HTTP_CACHE_DIR = "cache/http"
+RESOLVED_URL_CACHE_FILE = "cache/resolved_urls.json"
+RESOLVED_URL_SAVE_EVERY = 20  # newly resolved links between writes of RESOLVED_URL_CACHE_FILE
+HIGH_WATER_MARK_FILE = "cache/high_water_marks.json"
+COUPON_EXPIRY_CACHE_FILE = "cache/coupon_expiry.json"
+COURSE_DB_FILE = "cache/courses.db"  # SQLite store of every course, by category
+CATEGORY_CACHE_DIR = "cache/categories"  # legacy per-category JSON files, migrated into COURSE_DB_FILE
+PROCESSED_HISTORY_FILE = "cache/processed_courses.history"  # processed courses, imported from CACHE_FILE once
+COUPONSCORP_HISTORY_FILE = "cache/couponscorp.history"  # CouponScorpion articles, imported from its JSON cache once
+HISTORY_REINDEX_EVERY = 500  # records appended before a history's offset index is rewritten
+PROCESSED_BLOOM_FILE = "cache/processed.bloom"
+USE_PROCESSED_BLOOM = os.getenv('USE_PROCESSED_BLOOM') == '1'  # front the processed index with a Bloom filter
+PROCESSED_BLOOM_CAPACITY = 1_000_000  # processed courses the filter is sized for
+PROCESSED_BLOOM_ERROR_RATE = 0.001  # false positive rate at capacity
+COUPON_EXPIRY_BATCH_SIZE = 8  # coupons looked up concurrently
+COUPON_EXPIRY_RETRY_TTL = 6 * 3600  # seconds before a coupon with unknown expiry is looked up again
+HIGH_WATER_MARK_SIZE = 20  # newest offer IDs kept per source
+SESSION_COOKIE_TTL = 12 * 3600  # seconds to keep cookies that carry no expiry
 
 # WhatsApp settings
 WHATSAPP_WAIT_TIME = 30  # seconds to wait for WhatsApp Web to load
 DELAY_BETWEEN_MESSAGES = 60  # seconds between messages to avoid rate limiting
+
+# Per-host rate limits: host -> (seconds between requests, burst size)
+HOST_RATE_LIMITS = {
+    'real.discount': (RATE_LIMIT_DELAY, RATE_LIMIT_BURST),
+    'couponscorpion.com': (1, 4),
+    'udemy.com': (1, 4),
+    'web.whatsapp.com': (DELAY_BETWEEN_MESSAGES, 1),
+}
@@ -0,0 +1,73 @@
+"""Persist HTTP cookies to disk together with their expiry."""
+import json
+import os
+import time
+from email.utils import parsedate_to_datetime
+from http.cookies import SimpleCookie
+from typing import Dict, List
+
+from yarl import URL
+
+from config import SESSION_COOKIE_TTL
+
+
+def _cookie_expiry(morsel, now: float) -> float:
+    """Return the absolute expiry timestamp of a cookie morsel."""
+    if morsel['max-age']:
+        try:
+            return now + int(morsel['max-age'])
+        except ValueError:
+            pass
+    if morsel['expires']:
+        try:
+            return parsedate_to_datetime(morsel['expires']).timestamp()
+        except (TypeError, ValueError):
+            pass
+    # Session cookie: keep it for a limited time only
+    return now + SESSION_COOKIE_TTL
+
+
+def load_cookies(path: str) -> List[Dict]:
+    """Load the cookies from disk that have not expired yet."""
+    if not os.path.exists(path):
+        return []
+    try:
+        with open(path, 'r') as f:
+            cookies = json.load(f)
+    except json.JSONDecodeError:
+        print("Cookie file corrupted, starting fresh")
+        return []
+
+    now = time.time()
+    return [cookie for cookie in cookies if cookie['expires'] > now]
+
+
+def save_cookies(path: str, cookie_jar) -> None:
+    """Save every cookie of an aiohttp cookie jar with its expiry."""
+    now = time.time()
+    cookies = [
+        {
+            'name': morsel.key,
+            'value': morsel.value,
+            'domain': morsel['domain'],
+            'path': morsel['path'] or '/',
+            'expires': _cookie_expiry(morsel, now)
+        }
+        for morsel in cookie_jar
+    ]
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(cookies, f)
+
+
+def restore_cookies(cookie_jar, cookies: List[Dict]) -> None:
+    """Put saved cookies back into an aiohttp cookie jar."""
+    now = time.time()
+    for cookie in cookies:
+        morsel = SimpleCookie()
+        morsel[cookie['name']] = cookie['value']
+        morsel[cookie['name']]['domain'] = cookie['domain']
+        morsel[cookie['name']]['path'] = cookie['path']
+        morsel[cookie['name']]['max-age'] = str(int(cookie['expires'] - now))
+        cookie_jar.update_cookies(morsel, response_url=URL(f"https://{cookie['domain'].lstrip('.')}/"))
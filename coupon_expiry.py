@@ -0,0 +1,147 @@
+"""Look up Udemy coupon expiry over HTTP, in batches, with a cache that lives until the coupon expires."""
+import json
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+import requests
+
+from canonical import course_slug
+from config import (
+    COUPON_EXPIRY_BATCH_SIZE,
+    COUPON_EXPIRY_CACHE_FILE,
+    COUPON_EXPIRY_RETRY_TTL,
+    HTTP_TIMEOUT
+)
+from models import Course
+from rate_limiter import rate_limiter
+
+COURSE_PAGE_URL = "https://www.udemy.com/course/{slug}/"
+COUPON_API_URL = (
+    "https://www.udemy.com/api-2.0/course-landing-components/{course_id}/me/"
+    "?couponCode={coupon_code}&components=redeem_coupon"
+)
+_COURSE_ID_RE = re.compile(r'data-clp-course-id="(\d+)"|"course_id"\s*:\s*(\d+)')
+
+
+class CouponExpiryEnricher:
+    """
+    Resolve (course URL, coupon code) pairs to the coupon's expiry time.
+    Known coupons are answered from the cache until they expire; course IDs
+    are cached forever.
+    """
+
+    def __init__(self, session: requests.Session, cache_file: str = COUPON_EXPIRY_CACHE_FILE,
+                 batch_size: int = COUPON_EXPIRY_BATCH_SIZE):
+        self.session = session
+        self.cache_file = cache_file
+        self.batch_size = batch_size
+        self.cache = self.load_cache()
+
+    def load_cache(self) -> Dict:
+        """Load cached coupons and course IDs, dropping expired coupons."""
+        cache = {'coupons': {}, 'course_ids': {}}
+        if os.path.exists(self.cache_file):
+            try:
+                with open(self.cache_file, 'r') as f:
+                    cache.update(json.load(f))
+            except json.JSONDecodeError:
+                print("Coupon expiry cache corrupted, starting fresh")
+
+        now = time.time()
+        cache['coupons'] = {
+            key: entry for key, entry in cache['coupons'].items()
+            if entry['valid_until'] > now
+        }
+        return cache
+
+    def save_cache(self) -> None:
+        """Save the coupon expiry cache."""
+        os.makedirs(os.path.dirname(self.cache_file) or '.', exist_ok=True)
+        with open(self.cache_file, 'w') as f:
+            json.dump(self.cache, f)
+
+    def _cached(self, key: str) -> Optional[Dict]:
+        entry = self.cache['coupons'].get(key)
+        if entry and entry['valid_until'] > time.time():
+            return entry
+        return None
+
+    def _course_id(self, slug: str) -> Optional[str]:
+        if slug in self.cache['course_ids']:
+            return self.cache['course_ids'][slug]
+
+        url = COURSE_PAGE_URL.format(slug=slug)
+        rate_limiter.wait(url)
+        response = self.session.get(url, timeout=HTTP_TIMEOUT)
+        response.raise_for_status()
+        match = _COURSE_ID_RE.search(response.text)
+        if not match:
+            return None
+        course_id = match.group(1) or match.group(2)
+        self.cache['course_ids'][slug] = course_id
+        return course_id
+
+    def _fetch_expiry(self, slug: str, coupon_code: str) -> Optional[float]:
+        """Ask the Udemy API when a coupon ends; None if unknown or invalid."""
+        course_id = self._course_id(slug)
+        if not course_id:
+            print(f"Course ID not found for: {slug}")
+            return None
+
+        url = COUPON_API_URL.format(course_id=course_id, coupon_code=coupon_code)
+        rate_limiter.wait(url)
+        response = self.session.get(url, timeout=HTTP_TIMEOUT)
+        response.raise_for_status()
+
+        attempts = (response.json().get('redeem_coupon') or {}).get('discount_attempts') or []
+        for attempt in attempts:
+            if attempt.get('code') == coupon_code and attempt.get('status') == 'applied':
+                end_time = attempt['details']['campaign']['end_time']
+                return datetime.fromisoformat(end_time.replace('Z', '+00:00')).timestamp()
+        return None
+
+    def _lookup(self, key: str) -> Tuple[str, Dict]:
+        slug, coupon_code = key.split('|', 1)
+        try:
+            expires_at = self._fetch_expiry(slug, coupon_code)
+        except Exception as e:
+            # Any failure, including an unexpected response shape, only leaves this coupon's expiry unknown
+            print(f"Error fetching coupon expiry for {slug}: {str(e)}")
+            expires_at = None
+
+        # Unknown expiries are retried later instead of being cached for good
+        valid_until = expires_at if expires_at else time.time() + COUPON_EXPIRY_RETRY_TTL
+        return key, {'expires_at': expires_at, 'valid_until': valid_until}
+
+    def enrich(self, pairs: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], Optional[float]]:
+        """Return the expiry timestamp for every (course URL, coupon code) pair."""
+        keys = {}
+        for url, coupon_code in pairs:
+            slug = course_slug(url)
+            if slug and coupon_code:
+                keys[(url, coupon_code)] = f"{slug}|{coupon_code}"
+
+        missing = sorted({key for key in keys.values() if not self._cached(key)})
+        if missing:
+            print(f"Fetching expiry for {len(missing)} coupons ({len(keys) - len(missing)} cached)")
+        with ThreadPoolExecutor(max_workers=self.batch_size) as executor:
+            for start in range(0, len(missing), self.batch_size):
+                batch = missing[start:start + self.batch_size]
+                self.cache['coupons'].update(executor.map(self._lookup, batch))
+                self.save_cache()
+
+        return {pair: self.cache['coupons'][key]['expires_at'] for pair, key in keys.items()}
+
+    def enrich_courses(self, courses: Iterable[Course]) -> None:
+        """Set expires_at and expiry_date (YYYY-MM-DD) on courses that carry a coupon."""
+        courses = list(courses)
+        expiries = self.enrich((course.url, course.coupon_code) for course in courses if course.url)
+        for course in courses:
+            expires_at = expiries.get((course.url, course.coupon_code))
+            if expires_at:
+                course.expires_at = expires_at
+                course.expiry_date = datetime.fromtimestamp(expires_at).strftime('%Y-%m-%d')
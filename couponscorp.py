@@ -1,16 +1,32 @@
-import requests
+import asyncio
 from bs4 import BeautifulSoup
 from datetime import datetime, timedelta
-import time
-from typing import List, Dict
+from typing import List, Dict, Optional
 import json
 import os
 import random
+from async_fetcher import AsyncFetcher
+from canonical import coupon_from_url
+from crawl_state import HighWaterMark
+from history import History
+from journal import load_journal
+from models import Course
+from processed_index import shared_index
+from html_extract import (
+    SEARCH_TITLE_CLASSES,
+    dump_page_structure,
+    extract_course_url,
+    extract_search_results,
+    parse_html
+)
+from config import COUPONSCORP_HISTORY_FILE, COUPONSCORP_MAX_SEARCH_PAGES, DEBUG_HTML_DUMPS
 
 class CouponScorpionScraper:
-    def __init__(self):
+    def __init__(self, debug: bool = DEBUG_HTML_DUMPS):
+        self.debug = debug
         self.base_url = "https://couponscorpion.com"
         self.search_url = f"{self.base_url}/?s=design&post_type=post%2Cpage"
+        self.search_page_url = f"{self.base_url}/page/{{page}}/?s=design&post_type=post%2Cpage"
         # Add known article URLs
         self.known_articles = [
             "https://couponscorpion.com/design/complete-graphics-design-and-video-editing-masterclass/"
@@ -19,8 +35,7 @@ class CouponScorpionScraper:
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
             'Accept-Language': 'en-US,en;q=0.9',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Connection': 'keep-alive',
+            'Accept-Encoding': 'gzip, deflate',
             'Cache-Control': 'no-cache',
             'Pragma': 'no-cache',
             'DNT': '1',
@@ -36,143 +51,83 @@ class CouponScorpionScraper:
             'Origin': 'https://www.google.com'
         }
         self.cache_file = 'cache/couponscorp_cache.json'
+        # Each processed article is one history record, looked up through a memory-mapped index
+        self.history = History(COUPONSCORP_HISTORY_FILE)
         self.cache = self.load_cache()
+        # Courses already collected here or by the real.discount scraper
+        self.processed = shared_index()
 
-    def load_cache(self) -> Dict:
-        """Load previously processed articles from cache."""
-        if os.path.exists(self.cache_file):
-            try:
-                with open(self.cache_file, 'r') as f:
-                    return json.load(f)
-            except json.JSONDecodeError:
-                print("Cache file corrupted, starting fresh")
-                return {}
-        return {}
+    def load_cache(self) -> History:
+        """Open the history of processed articles, importing the old JSON cache on first use."""
+        if not len(self.history):
+            imported = self.history.import_records(load_journal(self.cache_file).items())
+            if imported:
+                print(f"Imported {imported} cached articles into {COUPONSCORP_HISTORY_FILE}")
+        return self.history
 
     def save_cache(self):
-        """Save processed articles to cache."""
-        os.makedirs('cache', exist_ok=True)
-        with open(self.cache_file, 'w') as f:
-            json.dump(self.cache, f)
+        """Write the offset index of processed articles."""
+        self.history.reindex()
 
     def get_page(self, url: str, retries: int = 3) -> BeautifulSoup:
-        """Fetch and parse a webpage with retries."""
-        for attempt in range(retries):
-            try:
-                session = requests.Session()
-                
-                # Add a small delay
-                time.sleep(2)
-                
-                # First get the main page to get any cookies
-                main_response = session.get(self.base_url, headers=self.headers, timeout=10)
-                if main_response.status_code == 200:
-                    print("Successfully connected to main page")
-                
-                # Update headers with cookies
-                self.headers['Cookie'] = '; '.join([f"{c.name}={c.value}" for c in session.cookies])
-                
-                # Another small delay
-                time.sleep(2)
-                
-                # Then get the actual page we want
-                response = session.get(url, headers=self.headers, timeout=10)
-                response.raise_for_status()
-                
-                # Print response info for debugging
-                print(f"\nResponse status: {response.status_code}")
-                print(f"Response encoding: {response.encoding}")
-                print(f"Content type: {response.headers.get('content-type', 'unknown')}")
-                
-                # Try to detect the encoding
-                if response.encoding is None or response.encoding == 'ISO-8859-1':
-                    response.encoding = 'utf-8'
-                
-                # Try multiple parsing methods
-                for parser in ['lxml', 'html.parser', 'html5lib']:
-                    try:
-                        soup = BeautifulSoup(response.text, parser)
-                        print(f"\nTrying parser: {parser}")
-                        
-                        # Check if we got a valid page
-                        if soup.find('body'):
-                            print(f"Successfully parsed with {parser}")
-                            
-                            # Debug: Print page structure
-                            try:
-                                print("\nPage Structure:")
-                                tags = set(tag.name for tag in soup.find_all())
-                                classes = set(cls for tag in soup.find_all() if tag.get('class') for cls in tag.get('class'))
-                                
-                                print("Available tags:", tags)
-                                print("\nAvailable classes:", classes)
-                                
-                                # Print first few characters of the page to check if we're getting valid HTML
-                                content_preview = response.text[:500].encode('utf-8', errors='ignore').decode('utf-8', errors='ignore')
-                                print("\nPage preview:")
-                                print(content_preview)
-                            except Exception as e:
-                                print(f"Error printing debug info: {e}")
-                            
-                            return soup
-                    except Exception as e:
-                        print(f"Parser {parser} failed: {e}")
-                        continue
-                
-                raise Exception("All parsers failed")
-                
-            except requests.RequestException as e:
-                if attempt == retries - 1:
-                    raise
-                print(f"Error fetching {url}: {e}. Retrying...")
-                time.sleep(2 ** attempt)  # Exponential backoff
+        """Fetch and parse a single webpage."""
+        async def fetch():
+            async with AsyncFetcher(self.headers) as fetcher:
+                await fetcher.warm_up(self.base_url)
+                return await fetcher.fetch_text(url, retries)
+
+        return self.parse_page(asyncio.run(fetch()))
 
-    def extract_course_info(self, article) -> Dict:
-        """Extract course information from an article."""
+    def parse_page(self, html: str) -> BeautifulSoup:
+        """Parse a fetched webpage; dumps its structure when debugging."""
+        soup = parse_html(html)
+        if self.debug:
+            dump_page_structure(soup, html)
+        return soup
+
+    def extract_search_result(self, article) -> Optional[Dict]:
+        """Extract title, article link and date from a search result."""
+        # Find the title using the exact class structure
+        title_element = article if article.name == 'h2' else article.find('h2', class_=SEARCH_TITLE_CLASSES)
+        if not title_element:
+            return None
+        
+        # Get the link from the title
+        title_link = title_element.find('a')
+        if not title_link:
+            return None
+        
+        title = title_link.get_text(strip=True)
+        article_url = title_link.get('href')
+        
+        if not article_url or not title:
+            return None
+
+        # Try to find the date
+        date_str = self.extract_date(article)
+        if not date_str:
+            date_str = datetime.now().strftime('%Y-%m-%d')
+
+        return {
+            'title': title,
+            'link': article_url,
+            'date': date_str
+        }
+
+    def extract_course_info(self, search_result: Dict, article_html: str) -> Optional[Course]:
+        """Combine a search result with the course URL from its article page."""
         try:
-            # Find the title using the exact class structure
-            title_element = article.find('h2', class_=['font130', 'mt0', 'mb10', 'mobfont120', 'lineheight25'])
-            if not title_element:
-                return None
-            
-            # Get the link from the title
-            title_link = title_element.find('a')
-            if not title_link:
-                return None
-            
-            title = title_link.get_text(strip=True)
-            article_url = title_link.get('href')
-            
-            if not article_url or not title:
+            course_url = extract_course_url(article_html)
+            if not course_url:
                 return None
-            
-            # Now visit the article page to get the course URL
-            print(f"\nVisiting article: {article_url}")
-            article_soup = self.get_page(article_url)
-            
-            # Wait for 5 seconds as requested
-            time.sleep(5)
-            
-            # Look for the button wrapper and get the course URL
-            button_wrapper = article_soup.find('div', class_='rh_button_wrapper')
-            if button_wrapper:
-                course_link = button_wrapper.find('a')
-                if course_link:
-                    course_url = course_link.get('href')
-                    if course_url:
-                        # Try to find the date
-                        date_str = self.extract_date(article)
-                        if not date_str:
-                            date_str = datetime.now().strftime('%Y-%m-%d')
-                        
-                        return {
-                            'title': title,
-                            'link': article_url,
-                            'course_url': course_url,
-                            'date': date_str
-                        }
-            
-            return None
+            return Course(
+                title=search_result['title'],
+                url=course_url,
+                coupon_code=coupon_from_url(course_url),
+                link=search_result['link'],
+                date=search_result['date'],
+                source='couponscorpion'
+            )
             
         except Exception as e:
             print(f"Error extracting course info: {e}")
@@ -205,101 +160,22 @@ class CouponScorpionScraper:
         
         return None
 
-    def extract_course_info_from_url(self, url: str) -> Dict:
-        """Extract course information directly from a known article URL."""
-        try:
-            print(f"\nVisiting known article: {url}")
-            article_soup = self.get_page(url)
-            
+    def known_article_result(self, url: str) -> Dict:
+        """Build a search-result record for a known article URL."""
+        return {
             # Get the title from the URL
-            title = url.split('/')[-2].replace('-', ' ').title()
-            
-            # Wait for 5 seconds as requested
-            time.sleep(5)
-            
-            # Look for the button wrapper and get the course URL
-            button_wrapper = article_soup.find('div', class_='rh_button_wrapper')
-            if button_wrapper:
-                course_link = button_wrapper.find('a')
-                if course_link:
-                    course_url = course_link.get('href')
-                    if course_url:
-                        return {
-                            'title': title,
-                            'link': url,
-                            'course_url': course_url,
-                            'date': datetime.now().strftime('%Y-%m-%d')  # Use current date
-                        }
-            
-            return None
-            
-        except Exception as e:
-            print(f"Error extracting course info from URL: {e}")
-            return None
+            'title': url.split('/')[-2].replace('-', ' ').title(),
+            'link': url,
+            'date': datetime.now().strftime('%Y-%m-%d')  # Use current date
+        }
 
-    def scrape_courses(self) -> List[Dict]:
+    def scrape_courses(self) -> List[Course]:
         """Scrape courses from CouponScorpion."""
         try:
             print("\n=== Starting CouponScorpion Scraping ===")
-            
-            # Calculate date range (3 days as requested)
-            today = datetime.now()
-            three_days_ago = today - timedelta(days=3)
-            
-            latest_articles = []
-            
-            # First try known article URLs
-            for article_url in self.known_articles:
-                try:
-                    # Check if article is already processed
-                    if article_url in self.cache:
-                        continue
-                    
-                    # Extract article info
-                    article_info = self.extract_course_info_from_url(article_url)
-                    if article_info:
-                        print(f"\nFound new course: {article_info['title']}")
-                        latest_articles.append(article_info)
-                        self.cache[article_url] = article_info
-                    
-                except Exception as e:
-                    print(f"Error processing article URL: {e}")
-                    continue
-            
-            # Then try the search page
-            try:
-                print(f"\nFetching search URL: {self.search_url}")
-                soup = self.get_page(self.search_url)
-                
-                # Find all course items with the specific class structure
-                articles = soup.find_all('h2', class_=['font130', 'mt0', 'mb10', 'mobfont120', 'lineheight25'])
-                
-                print(f"Found {len(articles)} potential course items from search")
-                
-                for article in articles:
-                    try:
-                        # Extract article info
-                        article_info = self.extract_course_info(article)
-                        if not article_info:
-                            continue
-                        
-                        # Check if article is already processed
-                        if article_info['link'] in self.cache:
-                            continue
-                        
-                        print(f"\nFound new course: {article_info['title']}")
-                        latest_articles.append(article_info)
-                        self.cache[article_info['link']] = article_info
-                        
-                    except Exception as e:
-                        print(f"Error processing article: {e}")
-                        continue
-                
-            except Exception as e:
-                print(f"Error processing search page: {e}")
-            
-            # Save updated cache
+            latest_articles = asyncio.run(self._scrape_courses_async())
             self.save_cache()
+            self.processed.save()
             
             print(f"\nFound {len(latest_articles)} new courses from the last 3 days")
             return latest_articles
@@ -308,6 +184,95 @@ class CouponScorpionScraper:
             print(f"Error during scraping: {e}")
             return []
 
+    async def _scrape_courses_async(self) -> List[Course]:
+        """Collect search results, then fetch all article pages concurrently."""
+        # Calculate date range (3 days as requested)
+        today = datetime.now()
+        three_days_ago = today - timedelta(days=3)
+
+        async with AsyncFetcher(self.headers) as fetcher:
+            await fetcher.warm_up(self.base_url)
+
+            # First the known article URLs
+            candidates = [
+                self.known_article_result(article_url)
+                for article_url in self.known_articles
+                if article_url not in self.cache
+            ]
+            # Result pages overlap as new articles push older ones down, so each article is fetched once
+            candidate_links = {candidate['link'] for candidate in candidates}
+
+            # Then the search pages, newest first, until articles from a previous run show up
+            high_water_mark = HighWaterMark('couponscorpion')
+            exhausted = False
+            try:
+                for page in range(1, COUPONSCORP_MAX_SEARCH_PAGES + 1):
+                    search_url = self.search_url if page == 1 else self.search_page_url.format(page=page)
+                    print(f"\nFetching search URL: {search_url}")
+                    search_html = await fetcher.fetch_text(search_url)
+                    if self.debug:
+                        self.parse_page(search_html)
+                    
+                    # Find all course items with the specific class structure
+                    articles = extract_search_results(search_html)
+                    print(f"Found {len(articles)} potential course items from search")
+                    if not articles:
+                        exhausted = True
+                        break
+
+                    for article in articles:
+                        search_result = self.extract_search_result(article)
+                        if not search_result or search_result['link'] in candidate_links:
+                            continue
+                        if high_water_mark.is_known(search_result['link']):
+                            print(f"Reached articles from a previous run at: {search_result['link']}")
+                            break
+                        high_water_mark.record(search_result['link'])
+                        # Check if article is already processed
+                        if search_result['link'] not in self.cache:
+                            candidates.append(search_result)
+                            candidate_links.add(search_result['link'])
+
+                    if high_water_mark.reached:
+                        break
+                
+            except Exception as e:
+                print(f"Error processing search page: {e}")
+                # A failed page after the first one usually means there are no more pages
+                exhausted = page > 1
+
+            print(f"\nVisiting {len(candidates)} articles")
+            article_pages = await fetcher.fetch_all(candidate['link'] for candidate in candidates)
+
+        # The mark moves only once the articles are fetched, leaving out any that failed
+        for candidate, article_html in zip(candidates, article_pages):
+            if article_html is None:
+                high_water_mark.fail(candidate['link'])
+        high_water_mark.save(exhausted)
+
+        latest_articles = []
+        for candidate, article_html in zip(candidates, article_pages):
+            if article_html is None:
+                continue
+            course = self.extract_course_info(candidate, article_html)
+            if not course:
+                continue
+            # Remembered either way, so the article page is not fetched again
+            self.history.add(course.link, course.to_dict())
+            if not self.processed.claim(course.url, course.coupon_code):
+                print(f"\nSkipping course already collected: {course.title}")
+                continue
+            # Nothing downstream stores these courses, so they are recorded here and real.discount skips them too
+            self.processed.add({
+                'url': course.url,
+                'coupon_code': course.coupon_code or '',
+                'source': course.source
+            })
+            print(f"\nFound new course: {course.title}")
+            latest_articles.append(course)
+
+        return latest_articles
+
 if __name__ == "__main__":
     scraper = CouponScorpionScraper()
     articles = scraper.scrape_courses()
@@ -315,9 +280,9 @@ if __name__ == "__main__":
     if articles:
         print("\nLatest courses:")
         for article in articles:
-            print(f"\nTitle: {article['title']}")
-            print(f"Date: {article['date']}")
-            print(f"Link: {article['link']}")
-            print(f"Course URL: {article['course_url']}")
+            print(f"\nTitle: {article.title}")
+            print(f"Date: {article.date}")
+            print(f"Link: {article.link}")
+            print(f"Course URL: {article.url}")
     else:
         print("No new courses found in the last 3 days")
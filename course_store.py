@@ -0,0 +1,239 @@
+"""SQLite store of every scraped course, replacing the per-category JSON files."""
+import json
+import os
+import sqlite3
+import time
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from config import CACHE_FILE, CATEGORY_CACHE_DIR, COURSE_DB_FILE
+from models import expiry_timestamp
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS courses (
+    url TEXT PRIMARY KEY,
+    coupon_code TEXT,
+    category TEXT,
+    title TEXT,
+    expires_at REAL,
+    first_seen REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Created after older databases get their expires_at column
+INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_courses_coupon_code ON courses (coupon_code);
+CREATE INDEX IF NOT EXISTS idx_courses_category ON courses (category, first_seen);
+CREATE INDEX IF NOT EXISTS idx_courses_first_seen ON courses (first_seen);
+CREATE INDEX IF NOT EXISTS idx_courses_expires_at ON courses (expires_at);
+DROP INDEX IF EXISTS idx_courses_expiry_date;
+"""
+
+INSERT = """
+INSERT INTO courses (url, coupon_code, category, title, expires_at, first_seen, updated_at, data)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+UPSERT = INSERT + """ON CONFLICT (url) DO UPDATE SET
+    coupon_code = excluded.coupon_code,
+    category = excluded.category,
+    title = excluded.title,
+    expires_at = excluded.expires_at,
+    updated_at = excluded.updated_at,
+    data = excluded.data
+"""
+
+# Coupons of unknown expiry are kept until their expiry is known
+LIVE = "(expires_at IS NULL OR expires_at > ?)"
+# Soonest expiry first, courses without one last, then by title
+ORDER = "ORDER BY expires_at IS NULL, expires_at, lower(title)"
+
+
+class CourseStore:
+    """
+    Courses keyed by URL, with indexes on coupon code, category and expiry.
+    Writes are upserts, so storing a course again updates it in place.
+    Reads only return live coupons; evict_expired deletes the rest.
+    """
+
+    def __init__(self, path: str = COURSE_DB_FILE):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        # WAL lets readers keep going while a run writes
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+        self._add_expires_at()
+        self.conn.executescript(INDEXES)
+
+    def _add_expires_at(self) -> None:
+        """Give databases from before expiry timestamps an expires_at column, filled from the records."""
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(courses)")]
+        if 'expires_at' in columns:
+            return
+        with self.conn:
+            self.conn.execute("ALTER TABLE courses ADD COLUMN expires_at REAL")
+            rows = self.conn.execute("SELECT url, data FROM courses").fetchall()
+            self.conn.executemany("UPDATE courses SET expires_at = ? WHERE url = ?", [
+                (self._expires_at(json.loads(data)), url) for url, data in rows
+            ])
+
+    @staticmethod
+    def _expires_at(course: Dict) -> Optional[float]:
+        expires_at = course.get('expires_at')
+        return expires_at if expires_at is not None else expiry_timestamp(course.get('expiry_date'))
+
+    def _row(self, course: Dict, category: Optional[str], first_seen: float, now: float) -> tuple:
+        return (
+            course['url'],
+            course.get('coupon_code'),
+            category if category is not None else course.get('category'),
+            course.get('title'),
+            self._expires_at(course),
+            first_seen,
+            now,
+            json.dumps(course, ensure_ascii=False)
+        )
+
+    def upsert_many(self, courses: Iterable[Dict], category: Optional[str] = None,
+                    first_seen: Optional[float] = None) -> int:
+        """Insert or update courses (keyed by URL); returns how many were written."""
+        now = time.time()
+        rows = [self._row(course, category, first_seen or now, now) for course in courses if course.get('url')]
+        with self.conn:
+            self.conn.executemany(UPSERT, rows)
+        return len(rows)
+
+    def upsert(self, course: Dict, category: Optional[str] = None) -> None:
+        """Insert or update one course."""
+        self.upsert_many([course], category)
+
+    def _select(self, where: str, params: tuple) -> List[Dict]:
+        cursor = self.conn.execute(f"SELECT data FROM courses WHERE {where} AND {LIVE} {ORDER}",
+                                   params + (time.time(),))
+        return [json.loads(data) for data, in cursor]
+
+    def get(self, url: str) -> Optional[Dict]:
+        """Return the stored course for a URL, unless its coupon has expired."""
+        row = self.conn.execute(f"SELECT data FROM courses WHERE url = ? AND {LIVE}", (url, time.time())).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def find_by_coupon(self, coupon_code: str) -> List[Dict]:
+        """Return the courses offered with a coupon code."""
+        return self._select("coupon_code = ?", (coupon_code,))
+
+    def category_courses(self, category: str) -> List[Dict]:
+        """Return every course of a category, soonest expiry first."""
+        return self._select("category = ?", (category,))
+
+    def new_since(self, timestamp: float, category: Optional[str] = None) -> List[Dict]:
+        """Return the courses first stored after timestamp."""
+        if category is None:
+            return self._select("first_seen > ?", (timestamp,))
+        return self._select("category = ? AND first_seen > ?", (category, timestamp))
+
+    def expiring_before(self, timestamp: float, category: Optional[str] = None) -> List[Dict]:
+        """Return the live courses whose coupon expires before timestamp."""
+        if category is None:
+            return self._select("expires_at < ?", (timestamp,))
+        return self._select("category = ? AND expires_at < ?", (category, timestamp))
+
+    def delivery_cursor(self, group: str) -> Optional[float]:
+        """first_seen of the newest course already delivered to a group, None before its first delivery."""
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (f"delivery_cursor:{group}",)).fetchone()
+        return float(row[0]) if row else None
+
+    def undelivered(self, group: str, category: str, start: float) -> Tuple[List[Dict], float]:
+        """
+        Return the live courses of a category first stored after the group's cursor,
+        and the cursor to advance to once they are delivered. A group without a
+        cursor starts at start, which must be below the first_seen of this run's
+        courses; older courses went out with the full-history messages.
+        """
+        cursor = self.delivery_cursor(group)
+        if cursor is None:
+            cursor = start
+            self.advance_cursor(group, cursor)
+        newest, = self.conn.execute("SELECT max(first_seen) FROM courses WHERE category = ? AND first_seen > ?",
+                                    (category, cursor)).fetchone()
+        return self.new_since(cursor, category), newest or cursor
+
+    def advance_cursor(self, group: str, cursor: float) -> None:
+        """Record that a group has received every course first stored up to cursor."""
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                              (f"delivery_cursor:{group}", repr(cursor)))
+
+    def evict_expired(self, now: Optional[float] = None) -> int:
+        """
+        Delete the courses whose coupon has expired. The expires_at index keeps
+        them at its low end, so this costs O(k log n) for k expired out of n.
+        """
+        with self.conn:
+            deleted = self.conn.execute("DELETE FROM courses WHERE expires_at <= ?",
+                                        (time.time() if now is None else now,)).rowcount
+        if deleted:
+            print(f"Evicted {deleted} expired courses from {self.path}")
+        return deleted
+
+    def migrate_json(self, categories_dir: str = CATEGORY_CACHE_DIR, processed_file: str = CACHE_FILE) -> None:
+        """
+        Import the old per-category JSON files and the processed-course list, once.
+        Imported courses count as first seen when their file was last written.
+        """
+        migrated = self.conn.execute("SELECT value FROM meta WHERE key = 'json_migrated'").fetchone()
+        if migrated:
+            return
+
+        imported = 0
+        if os.path.isdir(categories_dir):
+            for name in sorted(os.listdir(categories_dir)):
+                if not name.endswith('.json'):
+                    continue
+                path = os.path.join(categories_dir, name)
+                try:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        courses = json.load(f)
+                except json.JSONDecodeError:
+                    print(f"Skipping corrupted category cache: {path}")
+                    continue
+                imported += self.upsert_many(courses, name[:-len('.json')], os.path.getmtime(path))
+
+        if os.path.exists(processed_file):
+            try:
+                with open(processed_file, 'r') as f:
+                    processed = json.load(f).get('processed_courses', [])
+            except (json.JSONDecodeError, AttributeError):
+                print(f"Skipping corrupted processed-course cache: {processed_file}")
+                processed = []
+            # Processed entries carry only URL and coupon; never overwrite a full record
+            seen = os.path.getmtime(processed_file)
+            rows = [self._row(entry, None, seen, seen) for entry in processed
+                    if isinstance(entry, dict) and entry.get('url')]
+            with self.conn:
+                self.conn.executemany(INSERT + "ON CONFLICT (url) DO NOTHING", rows)
+            imported += len(rows)
+
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('json_migrated', ?)",
+                              (str(time.time()),))
+        if imported:
+            print(f"Migrated {imported} cached courses into {self.path}")
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+@lru_cache(maxsize=1)
+def get_course_store() -> CourseStore:
+    """Open the course store once per process, migrating the old JSON caches on first use."""
+    store = CourseStore()
+    store.migrate_json()
+    store.evict_expired()
+    return store
@@ -0,0 +1,77 @@
+"""High-water marks that let listing crawls stop at offers seen on a previous run."""
+import json
+import os
+from typing import Dict, List
+from urllib.parse import urlparse
+
+from config import HIGH_WATER_MARK_FILE, HIGH_WATER_MARK_SIZE
+
+
+def offer_id(url: str) -> str:
+    """Return the stable identifier of an offer or article (its URL slug)."""
+    path = urlparse(url).path.rstrip('/')
+    return path.rsplit('/', 1)[-1] or url
+
+
+def load_high_water_marks(path: str = HIGH_WATER_MARK_FILE) -> Dict[str, List[str]]:
+    """Load the newest offer IDs stored for every source."""
+    if os.path.exists(path):
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except json.JSONDecodeError:
+            print("High-water mark file corrupted, starting fresh")
+    return {}
+
+
+class HighWaterMark:
+    """
+    Track the newest offers of one source across runs.
+    The listing is newest-first, so the first known offer means everything
+    after it was already crawled.
+    """
+
+    def __init__(self, source: str, path: str = HIGH_WATER_MARK_FILE):
+        self.source = source
+        self.path = path
+        self.previous = load_high_water_marks(path).get(source, [])
+        self.known = set(self.previous)
+        self.seen = []
+        self.failed = set()
+        self.reached = False
+
+    def is_known(self, url: str) -> bool:
+        """Check an offer against the stored mark; remembers when the mark is hit."""
+        if offer_id(url) in self.known:
+            self.reached = True
+            return True
+        return False
+
+    def record(self, url: str) -> None:
+        """Remember an offer seen during this run, in listing order; see fail() for offers that break."""
+        self.seen.append(offer_id(url))
+
+    def fail(self, url: str) -> None:
+        """Keep an offer that could not be scraped out of the mark, so the next run retries it."""
+        self.failed.add(offer_id(url))
+
+    def save(self, exhausted: bool = False) -> None:
+        """
+        Store the newest offers of this run as the new mark.
+        The mark only moves when the crawl joined up with the previous one (or
+        the listing ran out), so offers skipped by max_courses are not lost.
+        Offers listed above a failed one are left out too: the next run stops at
+        the first marked offer and would never get back down to the failure.
+        """
+        failures = [position for position, offer in enumerate(self.seen) if offer in self.failed]
+        seen = self.seen[failures[-1] + 1:] if failures else self.seen
+        if not seen or not (self.reached or exhausted or not self.previous):
+            return
+
+        newest = list(dict.fromkeys(seen + self.previous))[:HIGH_WATER_MARK_SIZE]
+        marks = load_high_water_marks(self.path)
+        marks[self.source] = newest
+
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(self.path, 'w') as f:
+            json.dump(marks, f, indent=2)
@@ -0,0 +1,102 @@
+"""Bounded pool of headless Chrome workers for parallel page extraction."""
+import queue
+import threading
+from typing import Any, Callable, Iterable, List
+
+from selenium.common.exceptions import WebDriverException
+
+from browser import create_chrome_driver
+
+
+class DriverPool:
+    """
+    Run a function over many URLs with several browsers at once.
+    Each worker owns its own WebDriver; drivers are kept between calls.
+    """
+
+    def __init__(self, size: int, driver_factory: Callable = None, driver_release: Callable = None):
+        self.size = max(1, size)
+        self.driver_factory = driver_factory or (lambda: create_chrome_driver(headless=True))
+        self.driver_release = driver_release or (lambda driver: driver.quit())
+        self._idle_drivers = queue.Queue()
+        self._all_drivers = []
+        self._lock = threading.Lock()
+
+    def _acquire_driver(self):
+        try:
+            return self._idle_drivers.get_nowait()
+        except queue.Empty:
+            driver = self.driver_factory()
+            with self._lock:
+                self._all_drivers.append(driver)
+            return driver
+
+    def _discard_driver(self, driver) -> None:
+        """Drop a driver that may have crashed or hung; the next item starts a fresh one."""
+        with self._lock:
+            if driver in self._all_drivers:
+                self._all_drivers.remove(driver)
+        try:
+            self.driver_release(driver)
+        except Exception as e:
+            print(f"Error closing pooled driver: {str(e)}")
+
+    def _worker(self, tasks: queue.Queue, func: Callable, results: List):
+        driver = None
+        try:
+            while True:
+                try:
+                    index, item = tasks.get_nowait()
+                except queue.Empty:
+                    return
+
+                try:
+                    if driver is None:
+                        driver = self._acquire_driver()
+                    results[index] = func(driver, item)
+                except WebDriverException as e:
+                    print(f"Worker failed on {item}, replacing its driver: {str(e)}")
+                    if driver is not None:
+                        self._discard_driver(driver)
+                        driver = None
+                except Exception as e:
+                    print(f"Worker failed on {item}: {str(e)}")
+        finally:
+            if driver is not None:
+                self._idle_drivers.put(driver)
+
+    def map(self, func: Callable[[Any, Any], Any], items: Iterable) -> List:
+        """
+        Call func(driver, item) for every item using the pool's workers.
+        Results are returned in input order; failed items yield None.
+        """
+        items = list(items)
+        results = [None] * len(items)
+        if not items:
+            return results
+
+        tasks = queue.Queue()
+        for index, item in enumerate(items):
+            tasks.put((index, item))
+
+        workers = [
+            threading.Thread(target=self._worker, args=(tasks, func, results), daemon=True)
+            for _ in range(min(self.size, len(items)))
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        return results
+
+    def close(self):
+        """Quit (or hand back) every driver started by the pool."""
+        with self._lock:
+            drivers, self._all_drivers = self._all_drivers, []
+        for driver in drivers:
+            try:
+                self.driver_release(driver)
+            except Exception as e:
+                print(f"Error closing pooled driver: {str(e)}")
+        self._idle_drivers = queue.Queue()
@@ -0,0 +1,88 @@
+"""Plain HTTP page fetching with detection of JavaScript-only pages."""
+import re
+from typing import Dict, Optional
+
+import requests
+
+from config import HTTP_TIMEOUT, JS_ONLY_MIN_TEXT_LENGTH
+from http_cache import HttpCache
+from rate_limiter import rate_limiter
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+}
+
+# Markers left in the raw HTML of pages that only render through JavaScript
+JS_ONLY_MARKERS = [
+    'enable javascript',
+    'javascript is required',
+    'please turn javascript on',
+    'checking your browser',
+]
+
+_SCRIPT_RE = re.compile(r'<(script|style|noscript)\b.*?</\1\s*>', re.IGNORECASE | re.DOTALL)
+_TAG_RE = re.compile(r'<[^>]+>')
+
+
+def looks_js_only(html: str, required_marker: Optional[str] = None) -> bool:
+    """Return True if the HTML looks like an empty shell rendered by JavaScript."""
+    if not html:
+        return True
+
+    if required_marker and required_marker not in html:
+        return True
+
+    lowered = html.lower()
+    if any(marker in lowered for marker in JS_ONLY_MARKERS):
+        return True
+
+    visible_text = _TAG_RE.sub(' ', _SCRIPT_RE.sub(' ', html))
+    return len(visible_text.split()) < JS_ONLY_MIN_TEXT_LENGTH
+
+
+class HttpFetcher:
+    """Fetch pages over a single keep-alive requests.Session, revalidating cached copies."""
+
+    def __init__(self, headers: Optional[Dict] = None, timeout: int = HTTP_TIMEOUT, use_cache: bool = True):
+        self.session = requests.Session()
+        self.session.headers.update(headers or DEFAULT_HEADERS)
+        self.timeout = timeout
+        self.http_cache = HttpCache() if use_cache else None
+
+    def get_html(self, url: str, required_marker: Optional[str] = None) -> Optional[str]:
+        """
+        Fetch a page and return its HTML.
+        Returns None when the request fails or the page needs a real browser.
+        """
+        conditional_headers = self.http_cache.conditional_headers(url) if self.http_cache else {}
+        rate_limiter.wait(url)
+        try:
+            response = self.session.get(url, headers=conditional_headers, timeout=self.timeout)
+            html = self.http_cache.load(url) if self.http_cache and response.status_code == 304 else None
+            if html is None:
+                if response.status_code == 304:
+                    # Cache entry vanished since the validators were read
+                    rate_limiter.wait(url)
+                    response = self.session.get(url, timeout=self.timeout)
+                response.raise_for_status()
+        except requests.RequestException as e:
+            print(f"HTTP fetch failed for {url}: {str(e)}")
+            return None
+
+        if html is None:
+            if response.encoding is None or response.encoding == 'ISO-8859-1':
+                response.encoding = 'utf-8'
+            html = response.text
+            if self.http_cache:
+                self.http_cache.store(url, response.headers, html)
+
+        if looks_js_only(html, required_marker):
+            print(f"Page needs JavaScript, falling back to browser: {url}")
+            return None
+        return html
+
+    def close(self):
+        """Close the underlying session."""
+        self.session.close()
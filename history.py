@@ -0,0 +1,279 @@
+"""Append-only key/value history read through a memory-mapped offset index."""
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+
+from config import HISTORY_REINDEX_EVERY
+
+# One index entry: hash of the key and offset of its record in the data file
+INDEX_DTYPE = np.dtype([('hash', '<u8'), ('offset', '<u8')])
+
+
+def key_hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+class History:
+    """
+    Records kept as one line each, `<key json>\\t<value json>`, in a data file that
+    only grows, plus an index file of (key hash, offset) pairs sorted by hash.
+    Both files are memory-mapped: a lookup binary-searches the index and decodes
+    the one record it lands on, so opening costs the same however long the
+    history is. Records appended since the index was last written are kept in
+    memory and folded into the index every reindex_every records. Every access
+    holds the lock, so a reindex never swaps the mappings under a reader.
+    """
+
+    HEADER = struct.Struct('<8sQQ')
+    MAGIC = b'HISTIDX1'
+
+    def __init__(self, path: str, reindex_every: int = HISTORY_REINDEX_EVERY):
+        self.path = path
+        self.index_path = path + '.idx'
+        self.reindex_every = reindex_every
+        self._lock = threading.RLock()
+        self._file = None
+        self._data_map = None
+        self._index_map = None
+        self._entries = np.empty(0, dtype=INDEX_DTYPE)
+        self.indexed_size = 0
+        # Byte offset just past the last record this history knows of
+        self.end = 0
+        # Records past the index: key -> (offset, value)
+        self._tail: Dict[str, Tuple[int, Any]] = {}
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._truncate_torn_record()
+        self._open_index()
+        self._read_tail()
+        if len(self._tail) >= self.reindex_every:
+            self.reindex()
+
+    def _truncate_torn_record(self) -> None:
+        """Drop a last record cut short by a crash; it was never acknowledged."""
+        if not os.path.exists(self.path):
+            open(self.path, 'ab').close()
+            return
+        with open(self.path, 'rb+') as f:
+            size = f.seek(0, os.SEEK_END)
+            if not size:
+                return
+            f.seek(size - 1)
+            if f.read(1) == b'\n':
+                return
+            end = size
+            while end > 0:
+                start = max(0, end - 65536)
+                f.seek(start)
+                newline = f.read(end - start).rfind(b'\n')
+                if newline != -1:
+                    end = start + newline + 1
+                    break
+                end = start
+            print(f"Dropping a torn record at the end of {self.path}")
+            f.truncate(end)
+
+    def _open_index(self) -> None:
+        data_size = os.path.getsize(self.path)
+        if os.path.exists(self.index_path) and os.path.getsize(self.index_path) >= self.HEADER.size:
+            with open(self.index_path, 'rb') as f:
+                self._index_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, indexed_size, count = self.HEADER.unpack_from(self._index_map)
+            if (magic == self.MAGIC and indexed_size <= data_size
+                    and len(self._index_map) == self.HEADER.size + count * INDEX_DTYPE.itemsize):
+                self._entries = np.frombuffer(self._index_map, dtype=INDEX_DTYPE, count=count,
+                                              offset=self.HEADER.size)
+                self.indexed_size = indexed_size
+            else:
+                # Stale or foreign index: every record counts as unindexed until the next reindex
+                print(f"Ignoring unusable index {self.index_path}")
+                self._close_index()
+        if self.indexed_size:
+            with open(self.path, 'rb') as f:
+                self._data_map = mmap.mmap(f.fileno(), self.indexed_size, access=mmap.ACCESS_READ)
+
+    def _close_index(self) -> None:
+        # The arrays borrow the mapping's buffer and must go first
+        self._entries = np.empty(0, dtype=INDEX_DTYPE)
+        self.indexed_size = 0
+        for mapping in (self._index_map, self._data_map):
+            if mapping is None:
+                continue
+            try:
+                mapping.close()
+            except BufferError:
+                # Still exported by an array someone holds; it is unmapped once that array is freed
+                pass
+        self._index_map = None
+        self._data_map = None
+
+    def _read_tail(self) -> None:
+        with open(self.path, 'rb') as f:
+            f.seek(self.indexed_size)
+            offset = self.indexed_size
+            for line in f:
+                key, value = line.split(b'\t', 1)
+                self._tail.setdefault(json.loads(key), (offset, json.loads(value)))
+                offset += len(line)
+        self.end = offset
+
+    def _find(self, key: str) -> Optional[int]:
+        """Offset of the key's record in the indexed part of the file."""
+        hashes = self._entries['hash']
+        target = np.uint64(key_hash(key))
+        first = int(np.searchsorted(hashes, target, side='left'))
+        last = int(np.searchsorted(hashes, target, side='right'))
+        data = self._data_map
+        # Several entries only on a 64-bit hash collision
+        for offset in self._entries['offset'][first:last].tolist():
+            separator = data.find(b'\t', offset)
+            if json.loads(data[offset:separator]) == key:
+                return offset
+        return None
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._tail or bool(self.indexed_size and self._find(key) is not None)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Decode and return the value stored under key."""
+        with self._lock:
+            if key in self._tail:
+                return self._tail[key][1]
+            offset = self._find(key) if self.indexed_size else None
+            if offset is None:
+                return default
+            data = self._data_map
+            separator = data.find(b'\t', offset)
+            return json.loads(data[separator + 1:data.find(b'\n', separator)])
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.get(key, self)
+        if value is self:
+            raise KeyError(key)
+        return value
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries) + len(self._tail)
+
+    @staticmethod
+    def _line(key: str, value: Any) -> bytes:
+        line = json.dumps(key, ensure_ascii=False) + '\t' + json.dumps(value, ensure_ascii=False) + '\n'
+        return line.encode('utf-8')
+
+    def add(self, key: str, value: Any) -> bool:
+        """Append a record; False if the key is already recorded. Records are never rewritten."""
+        with self._lock:
+            if key in self:
+                return False
+            if self._file is None:
+                self._file = open(self.path, 'ab')
+            offset = self._file.seek(0, os.SEEK_END)
+            line = self._line(key, value)
+            self._file.write(line)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._tail[key] = (offset, value)
+            self.end = offset + len(line)
+            if len(self._tail) >= self.reindex_every:
+                self._reindex()
+        return True
+
+    def import_records(self, records: Iterable[Tuple[str, Any]]) -> int:
+        """Append many records with one write and one index rebuild; returns how many were new."""
+        with self._lock:
+            pending = {}
+            for key, value in records:
+                if key not in pending and key not in self._tail:
+                    pending[key] = value
+            keys = list(pending)
+            hashes = np.array([key_hash(key) for key in keys], dtype='<u8')
+            if self.indexed_size and len(keys):
+                # Only keys whose hash is already indexed need their record compared
+                known = np.flatnonzero(np.isin(hashes, self._entries['hash'])).tolist()
+                duplicates = [position for position in known if self._find(keys[position]) is not None]
+                if duplicates:
+                    keep = np.ones(len(keys), dtype=bool)
+                    keep[duplicates] = False
+                    keys = [key for key, kept in zip(keys, keep.tolist()) if kept]
+                    hashes = hashes[keep]
+            if not keys:
+                return 0
+
+            lines = [self._line(key, pending[key]) for key in keys]
+            imported = np.empty(len(lines), dtype=INDEX_DTYPE)
+            imported['hash'] = hashes
+            imported['offset'] = os.path.getsize(self.path) + np.cumsum([0] + [len(line) for line in lines[:-1]])
+            with open(self.path, 'ab') as f:
+                f.write(b''.join(lines))
+                f.flush()
+                os.fsync(f.fileno())
+                self.end = f.tell()
+            self._reindex(imported)
+        return len(keys)
+
+    def reindex(self) -> None:
+        """Fold the records appended since the last index into the index file."""
+        with self._lock:
+            self._reindex()
+
+    def _reindex(self, imported: Optional[np.ndarray] = None) -> None:
+        if not self._tail and imported is None and os.path.exists(self.index_path):
+            return
+        tail = np.array([(key_hash(key), offset) for key, (offset, _) in self._tail.items()], dtype=INDEX_DTYPE)
+        entries = np.concatenate([self._entries, tail] + ([imported] if imported is not None else []))
+        entries = entries[np.argsort(entries['hash'], kind='stable')]
+        data_size = os.path.getsize(self.path)
+
+        temp_path = self.index_path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(self.HEADER.pack(self.MAGIC, data_size, len(entries)))
+            f.write(entries.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        self._close_index()
+        try:
+            os.replace(temp_path, self.index_path)
+        except OSError as e:
+            # The old index still stands; everything past it is read back as the tail
+            print(f"Error writing index {self.index_path}: {str(e)}")
+            self._open_index()
+            self._tail.clear()
+            self._read_tail()
+            return
+        self._tail.clear()
+        self._open_index()
+
+    def items(self, start: int = 0) -> Iterator[Tuple[str, Any]]:
+        """Yield (key, value) in the order records were added, from byte offset start on."""
+        with open(self.path, 'rb') as f:
+            f.seek(start)
+            for line in f:
+                key, value = line.split(b'\t', 1)
+                yield json.loads(key), json.loads(value)
+
+    def keys(self, start: int = 0) -> Iterator[str]:
+        """Yield the keys in the order records were added from byte offset start, decoding only the keys."""
+        with open(self.path, 'rb') as f:
+            f.seek(start)
+            for line in f:
+                yield json.loads(line[:line.index(b'\t')])
+
+    def values(self) -> Iterator[Any]:
+        return (value for _, value in self.items())
+
+    def close(self) -> None:
+        """Write the index and release the files."""
+        with self._lock:
+            self._reindex()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            self._close_index()
@@ -0,0 +1,111 @@
+"""Targeted HTML extraction: parse once, with the fastest parser, only the nodes we need."""
+from typing import Dict, List, Optional
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    import lxml  # noqa: F401
+    FAST_PARSER = 'lxml'
+except ImportError:
+    FAST_PARSER = 'html.parser'
+
+# Classes of the title <h2> on couponscorpion search result pages
+SEARCH_TITLE_CLASSES = ['font130', 'mt0', 'mb10', 'mobfont120', 'lineheight25']
+
+
+def _has_class(*names):
+    """Match a class attribute while parsing, when it is still a raw string."""
+    def match(value):
+        if not value:
+            return False
+        classes = value.split() if isinstance(value, str) else value
+        return any(name in classes for name in names)
+    return match
+
+
+# Only these subtrees are built; everything else is skipped while parsing
+SEARCH_RESULTS_ONLY = SoupStrainer('h2', class_=_has_class(*SEARCH_TITLE_CLASSES))
+BUTTON_WRAPPER_ONLY = SoupStrainer('div', class_=_has_class('rh_button_wrapper'))
+
+
+def parse_html(html: str, parse_only: Optional[SoupStrainer] = None) -> BeautifulSoup:
+    """Parse HTML with the fastest available parser."""
+    return BeautifulSoup(html, FAST_PARSER, parse_only=parse_only)
+
+
+def extract_search_results(html: str) -> List:
+    """Return the title <h2> elements (with their date spans) of a search page."""
+    return parse_html(html, SEARCH_RESULTS_ONLY).find_all('h2')
+
+
+def extract_course_url(html: str) -> Optional[str]:
+    """Return the course URL behind the rh_button_wrapper button of an article page."""
+    button_wrapper = parse_html(html, BUTTON_WRAPPER_ONLY).find('div', class_='rh_button_wrapper')
+    if button_wrapper:
+        course_link = button_wrapper.find('a')
+        if course_link:
+            return course_link.get('href')
+    return None
+
+
+def dump_page_structure(soup: BeautifulSoup, html: str) -> None:
+    """Print every tag and class name of a page (debugging only)."""
+    try:
+        print("\nPage Structure:")
+        tags = set()
+        classes = set()
+        for tag in soup.find_all():
+            tags.add(tag.name)
+            classes.update(tag.get('class') or [])
+
+        print("Available tags:", tags)
+        print("\nAvailable classes:", classes)
+
+        # Print first few characters of the page to check if we're getting valid HTML
+        print("\nPage preview:")
+        print(html[:500])
+    except Exception as e:
+        print(f"Error printing debug info: {e}")
+
+
+def _card_text(card, name: str, class_: str) -> Optional[str]:
+    element = card.find(name, class_=class_)
+    return element.get_text(strip=True) if element else None
+
+
+def parse_listing_cards(listing_soup: BeautifulSoup, base_url: str) -> List[Dict]:
+    """
+    Read every real.discount listing card in one pass over an already parsed page.
+    Each lookup is scoped to its own card, so the cost is linear in the number of cards.
+    """
+    cards = []
+    for card in listing_soup.select("a[href*='/offer/']"):
+        current_price = None
+        if dollar_icon := card.find('i', class_='fas fa-dollar-sign'):
+            # The price sits in the ml-1 block next to the dollar sign icon
+            price_container = dollar_icon.find_parent('div').find('div', class_='ml-1')
+            if price_container and (free_price := price_container.find('span')):
+                if free_price.get_text(strip=True).replace('$', '').strip() == '0':
+                    current_price = '0'
+
+        # The p-2 detail blocks hold the duration first, then the course language
+        details = [_card_text(detail, 'div', 'mt-1') for detail in card.find_all('div', class_='p-2 text-center')]
+        course_length = details[0] if details else None
+        language = next((detail for detail in details if detail and 'english' in detail.lower()),
+                        details[-1] if len(details) > 1 else None)
+
+        category = None
+        if category_container := card.find('div', class_='row'):
+            category = _card_text(category_container, 'div', 'ml-3')
+
+        cards.append({
+            'title': _card_text(card, 'h3', 'ml-3'),
+            'original_price': _card_text(card, 'span', 'card-price-full'),
+            'current_price': current_price,
+            'course_length': course_length,
+            'language': language,
+            'category': category,
+            'link': urljoin(base_url, card['href'])
+        })
+    return cards
@@ -0,0 +1,74 @@
+"""On-disk HTTP cache that revalidates pages with ETag / Last-Modified."""
+import hashlib
+import json
+import os
+import time
+from typing import Dict, Mapping, Optional
+
+from config import HTTP_CACHE_DIR
+
+
+class HttpCache:
+    """
+    Store page bodies next to their validators.
+    Each URL maps to <sha1>.json (metadata) and <sha1>.html (body).
+    """
+
+    def __init__(self, cache_dir: str = HTTP_CACHE_DIR):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _paths(self, url: str):
+        key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        base = os.path.join(self.cache_dir, key)
+        return base + '.json', base + '.html'
+
+    def _load_meta(self, url: str) -> Optional[Dict]:
+        meta_path, body_path = self._paths(url)
+        if not (os.path.exists(meta_path) and os.path.exists(body_path)):
+            return None
+        try:
+            with open(meta_path, 'r') as f:
+                return json.load(f)
+        except json.JSONDecodeError:
+            return None
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """Return If-None-Match / If-Modified-Since headers for a cached URL."""
+        meta = self._load_meta(url)
+        if not meta:
+            return {}
+
+        headers = {}
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+        return headers
+
+    def load(self, url: str) -> Optional[str]:
+        """Return the cached body of a URL."""
+        _, body_path = self._paths(url)
+        if self._load_meta(url) is None:
+            return None
+        with open(body_path, 'r', encoding='utf-8') as f:
+            return f.read()
+
+    def store(self, url: str, headers: Mapping[str, str], body: str) -> None:
+        """Cache a 200 response if it carries a validator."""
+        etag = headers.get('ETag')
+        last_modified = headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return
+
+        meta_path, body_path = self._paths(url)
+        with open(body_path, 'w', encoding='utf-8') as f:
+            f.write(body)
+        # Metadata is written last so a half-written entry is never used
+        with open(meta_path, 'w') as f:
+            json.dump({
+                'url': url,
+                'etag': etag,
+                'last_modified': last_modified,
+                'fetched_at': time.time()
+            }, f)
@@ -0,0 +1,40 @@
+"""Reader for the old JSON snapshot + JSONL journal caches, imported into history files."""
+import json
+import os
+from typing import Any, Dict, Optional
+
+
+def load_journal(snapshot_path: str, journal_path: Optional[str] = None) -> Dict[str, Any]:
+    """Rebuild a cache from its snapshot and the journal lines written after it."""
+    journal_path = journal_path or os.path.splitext(snapshot_path)[0] + '.jsonl'
+    state = {}
+    if os.path.exists(snapshot_path):
+        try:
+            with open(snapshot_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except json.JSONDecodeError:
+            print(f"Snapshot {snapshot_path} corrupted, rebuilding from the journal")
+
+    if not os.path.exists(journal_path):
+        return state
+
+    # Replaying is idempotent: a crash between snapshot and journal reset replays lines twice
+    added = {}
+    with open(journal_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                op, key, value = json.loads(line)
+            except ValueError:
+                # Only the last line can be torn, by a crash mid-write
+                print(f"Skipping unreadable journal line in {journal_path}")
+                continue
+            if op == 'set':
+                state[key] = value
+            elif op == 'add':
+                if key not in added:
+                    added[key] = {json.dumps(item, sort_keys=True) for item in state.get(key, [])}
+                marker = json.dumps(value, sort_keys=True)
+                if marker not in added[key]:
+                    added[key].add(marker)
+                    state.setdefault(key, []).append(value)
+    return state
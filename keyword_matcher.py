@@ -0,0 +1,132 @@
+"""Category keyword matching compiled once into a single multi-pattern automaton."""
+import re
+from functools import lru_cache
+from typing import Dict, List, Set, Tuple
+
+
+class KeywordMatcher:
+    """
+    Score text against every category's keywords in one pass.
+    Scores are the same as the original per-keyword scan: +3 for each keyword
+    found in title+description, +1 for each keyword word present as a whole
+    word, and +2 for each keyword found in the title.
+    """
+
+    def __init__(self, categories: Dict):
+        # (category, keywords, keyword word sets), in config order
+        self.categories: List[Tuple[str, List[str], List[Set[str]]]] = [
+            (category, list(data['keywords']), [set(keyword.split()) for keyword in data['keywords']])
+            for category, data in categories.items()
+        ]
+
+        # Word -> (category index, keyword index) for the word-level score
+        self.word_index: Dict[str, List[Tuple[int, int]]] = {}
+        patterns: Dict[str, List[Tuple[int, int]]] = {}
+        for cat_index, (_, keywords, keyword_words) in enumerate(self.categories):
+            for kw_index, keyword in enumerate(keywords):
+                patterns.setdefault(keyword, []).append((cat_index, kw_index))
+                for word in keyword_words[kw_index]:
+                    self.word_index.setdefault(word, []).append((cat_index, kw_index))
+
+        self._build_automaton(patterns)
+
+    def _build_automaton(self, patterns: Dict[str, List[Tuple[int, int]]]) -> None:
+        # Keywords found at a position are exactly the prefixes of the longest one found there
+        self._empty = patterns.get('', [])
+        keywords = sorted((pattern for pattern in patterns if pattern), key=len, reverse=True)
+        self._prefixes: Dict[str, List[Tuple[int, List[Tuple[int, int]]]]] = {
+            keyword: [(len(other), patterns[other]) for other in keywords if keyword.startswith(other)]
+            for keyword in keywords
+        }
+        # A trie-shaped pattern inside a lookahead finds the longest keyword at every position in one scan
+        self._pattern = re.compile('(?=(' + _trie_pattern(keywords) + '))') if keywords else None
+
+    def find(self, text: str, title_length: int = 0) -> Tuple[Set[Tuple[int, int]], Set[Tuple[int, int]]]:
+        """
+        Return the keyword positions found anywhere in text, and those found
+        entirely within its first title_length characters.
+        """
+        found = set(self._empty)
+        in_title = set(self._empty)
+        if self._pattern is None:
+            return found, in_title
+
+        prefixes = self._prefixes
+        for match in self._pattern.finditer(text):
+            start = match.start()
+            for length, positions in prefixes[match.group(1)]:
+                found.update(positions)
+                if start + length <= title_length:
+                    in_title.update(positions)
+        return found, in_title
+
+    def score(self, title: str, description: str) -> List[Tuple[str, int, List[str]]]:
+        """Return (category, score, matched keywords) for every category that scored."""
+        title_desc = (title + ' ' + description).lower()
+        words = set(title_desc.split())
+        title_lower = title.lower()
+
+        if title_desc.startswith(title_lower + ' '):
+            found, in_title = self.find(title_desc, len(title_lower))
+        else:
+            # Lowercasing can change around the join (e.g. a final sigma); scan the title alone
+            found, _ = self.find(title_desc)
+            in_title, _ = self.find(title_lower)
+
+        word_hits = set()
+        for word in words:
+            word_hits.update(self.word_index.get(word, ()))
+
+        scores = [0] * len(self.categories)
+        matched_keywords: List[List[str]] = [[] for _ in self.categories]
+        # Sorted hits keep the original order: exact keywords first, then their words
+        for cat_index, kw_index in sorted(found):
+            scores[cat_index] += 3
+            matched_keywords[cat_index].append(self.categories[cat_index][1][kw_index])
+        for cat_index, kw_index in sorted(word_hits):
+            common = self.categories[cat_index][2][kw_index] & words
+            scores[cat_index] += len(common)
+            matched_keywords[cat_index].extend(list(common))
+        for cat_index, _ in in_title:
+            scores[cat_index] += 2
+
+        return [
+            (category, scores[cat_index], matched_keywords[cat_index])
+            for cat_index, (category, _, _) in enumerate(self.categories)
+            if scores[cat_index] > 0
+        ]
+
+
+def _trie_pattern(keywords: List[str]) -> str:
+    """Build a regex over a keyword trie; at each position it matches the longest keyword."""
+    trie: Dict = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node: Dict) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        pattern = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        # A keyword ending here still matches when no longer one does
+        return '(?:' + pattern + ')?' if '' in node else pattern
+
+    return build(trie)
+
+
+def freeze_categories(categories: Dict) -> Tuple:
+    """Hashable snapshot of a category table's keywords, for caching compiled tables."""
+    return tuple((category, tuple(data['keywords'])) for category, data in categories.items())
+
+
+@lru_cache(maxsize=8)
+def _compiled(frozen: Tuple) -> KeywordMatcher:
+    return KeywordMatcher({category: {'keywords': list(keywords)} for category, keywords in frozen})
+
+
+def get_matcher(categories: Dict) -> KeywordMatcher:
+    """Return the compiled matcher for a category table, building it only once."""
+    return _compiled(freeze_categories(categories))
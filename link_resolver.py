@@ -0,0 +1,137 @@
+"""Resolve affiliate and enroll links to their final Udemy URL over HTTP."""
+import json
+import os
+import threading
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urljoin, urlparse
+
+import requests
+
+from config import HTTP_TIMEOUT, RESOLVED_URL_CACHE_FILE, RESOLVED_URL_SAVE_EVERY
+from rate_limiter import rate_limiter
+
+# Query parameters used by affiliate networks to carry the destination URL
+WRAPPED_URL_PARAMS = ['murl', 'url']
+# Hosts where the redirect chain is considered finished
+DESTINATION_HOSTS = ['udemy.com']
+
+
+def unwrap_affiliate_url(url: str) -> str:
+    """Return the destination URL carried in a murl=/url= parameter, if any."""
+    query = parse_qs(urlparse(url).query)
+    for param in WRAPPED_URL_PARAMS:
+        for value in query.get(param, []):
+            if value.startswith(('http://', 'https://')):
+                return value
+    return url
+
+
+def is_destination(url: str) -> bool:
+    """Check whether a URL already points at the course platform."""
+    host = urlparse(url).netloc.lower()
+    return any(host == dest or host.endswith('.' + dest) for dest in DESTINATION_HOSTS)
+
+
+class LinkResolver:
+    """
+    Follow redirect chains without downloading bodies and cache the result per offer.
+    Only links that end on the course platform are cached. Workers share one
+    resolver, so the cache is written under a lock every save_every new links.
+    """
+
+    def __init__(self, session: requests.Session, cache_file: str = RESOLVED_URL_CACHE_FILE,
+                 max_redirects: int = 10, save_every: int = RESOLVED_URL_SAVE_EVERY):
+        self.session = session
+        self.cache_file = cache_file
+        self.max_redirects = max_redirects
+        self.save_every = save_every
+        self._lock = threading.Lock()
+        self._unsaved = 0
+        self.cache = self.load_cache()
+
+    def load_cache(self) -> Dict[str, str]:
+        """Load previously resolved links."""
+        if os.path.exists(self.cache_file):
+            try:
+                with open(self.cache_file, 'r') as f:
+                    return json.load(f)
+            except json.JSONDecodeError:
+                print("Resolved URL cache corrupted, starting fresh")
+        return {}
+
+    def save_cache(self) -> None:
+        """Save resolved links."""
+        with self._lock:
+            os.makedirs(os.path.dirname(self.cache_file) or '.', exist_ok=True)
+            temp_path = self.cache_file + '.tmp'
+            with open(temp_path, 'w') as f:
+                json.dump(self.cache, f)
+            os.replace(temp_path, self.cache_file)
+            self._unsaved = 0
+
+    def get(self, offer_url: str) -> Optional[str]:
+        """Return the cached destination for an offer page."""
+        return self.cache.get(offer_url)
+
+    def remember(self, offer_url: str, resolved_url: str) -> None:
+        """Store a destination found by other means (e.g. the browser); anything off the platform is ignored."""
+        if not is_destination(resolved_url):
+            return
+        with self._lock:
+            self.cache[offer_url] = resolved_url
+            self._unsaved += 1
+            save_due = self._unsaved >= self.save_every
+        if save_due:
+            self.save_cache()
+
+    def resolve(self, offer_url: str, link: str) -> Optional[str]:
+        """Resolve an offer's enroll link, reusing the cached result when possible."""
+        cached_url = self.cache.get(offer_url)
+        if cached_url:
+            return cached_url
+
+        resolved_url = self.follow_redirects(link)
+        if resolved_url:
+            self.remember(offer_url, resolved_url)
+        return resolved_url
+
+    def _next_location(self, url: str) -> Optional[str]:
+        """Request a URL without its body and return the redirect target, if any."""
+        rate_limiter.wait(url)
+        response = self.session.head(url, allow_redirects=False, timeout=HTTP_TIMEOUT)
+        if response.status_code in (403, 405, 501):
+            # Some trackers refuse HEAD; stream a GET and drop it before the body
+            response = self.session.get(url, allow_redirects=False, stream=True, timeout=HTTP_TIMEOUT)
+            response.close()
+
+        if response.is_redirect:
+            return urljoin(url, response.headers['Location'])
+        return None
+
+    def follow_redirects(self, url: str) -> Optional[str]:
+        """
+        Walk a redirect chain hop by hop, unwrapping affiliate parameters.
+        Returns None unless the chain ends on the course platform, so callers can fall back to the browser.
+        """
+        try:
+            for _ in range(self.max_redirects):
+                unwrapped = unwrap_affiliate_url(url)
+                if unwrapped != url:
+                    url = unwrapped
+                    continue
+                if is_destination(url):
+                    return url
+
+                next_url = self._next_location(url)
+                if not next_url:
+                    # A JavaScript or meta-refresh hop that only a browser can follow
+                    print(f"Redirect chain stopped before the course page: {url}")
+                    return None
+                url = next_url
+
+            print(f"Too many redirects while resolving: {url}")
+            return None
+
+        except requests.RequestException as e:
+            print(f"Error resolving link {url}: {str(e)}")
+            return None
@@ -26,8 +26,23 @@ from utils import (
     parse_expiry_date,
     load_category_cache,
     save_category_cache,
+    load_undelivered_courses,
+    mark_delivered,
     merge_course_lists
 )
+from fetcher import HttpFetcher
+from browser import create_chrome_driver
+from driver_pool import DriverPool
+from browser_service import BrowserService, accept_consent
+from link_resolver import LinkResolver, is_destination, unwrap_affiliate_url
+from canonical import coupon_from_url
+from models import Course
+from coupon_expiry import CouponExpiryEnricher
+from category_engine import category_engine
+from processed_index import shared_index
+from rate_limiter import rate_limiter
+from crawl_state import HighWaterMark
+from html_extract import parse_html, parse_listing_cards
 from config import *
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
@@ -50,17 +65,30 @@ phone_number = config['whatsapp']['phone_number']
 
 class CouponScraper:
     
-    def __init__(self, base_url='https://www.real.discount/', max_courses=30):
-        """Initialize the scraper."""
+    def __init__(self, base_url='https://www.real.discount/', max_courses=30,
+                 browser_service: Optional[BrowserService] = None):
+        """
+        Initialize the scraper.
+        With a browser_service, drivers are borrowed warm instead of launched.
+        """
         load_dotenv()
         self.max_courses = max_courses
         self.scraped_courses = 0
-        #self.driver = webdriver.Chrome() 
         self.base_url = base_url  # Ensure base_url is an attribute
-        self.setup_selenium()
-        # Start in full-screen mode
-        self.driver.maximize_window()
+        # Chrome is only started when a page cannot be fetched over plain HTTP
+        self._driver = None
+        self._consent_accepted = False
+        self.browser_service = browser_service
+        self.fetcher = HttpFetcher()
+        self.link_resolver = LinkResolver(self.fetcher.session)
+        self.expiry_enricher = CouponExpiryEnricher(self.fetcher.session)
+        if browser_service:
+            self.driver_pool = DriverPool(DRIVER_POOL_SIZE, browser_service.acquire, browser_service.release)
+        else:
+            self.driver_pool = DriverPool(DRIVER_POOL_SIZE)
         self.cache = load_cache()
+        # Shared with the other scrapers, so a course and coupon is only collected once
+        self.processed = shared_index()
         self.courses = []
         self.course_links = set()  # Initialize the course_links set
 
@@ -74,104 +102,33 @@ class CouponScraper:
                 self.group_ids[category] = group_id
                 print(f"Loaded group ID for {category}: {group_id}")
 
+    @property
+    def driver(self):
+        """Start the browser on first use."""
+        if self._driver is None and self.browser_service:
+            self._driver = self.browser_service.acquire()
+            self._consent_accepted = True
+        elif self._driver is None:
+            self.setup_selenium()
+            if not BROWSER_LEAN_MODE:
+                # Start in full-screen mode
+                self._driver.maximize_window()
+        return self._driver
+
     def setup_selenium(self):
         """Setup Selenium WebDriver with proper options."""
-        chrome_options = webdriver.ChromeOptions()
-        chrome_options.add_argument('--ignore-certificate-errors')
-        chrome_options.add_argument('--ignore-ssl-errors')
-        
-        # Try to locate Chrome executable
-        chrome_paths = [
-            r"C:\Program Files\Google\Chrome\Application\chrome.exe",
-            r"C:\Program Files (x86)\Google\Chrome\Application\chrome.exe",
-            r"%LOCALAPPDATA%\Google\Chrome\Application\chrome.exe"
-        ]
-        
-        chrome_binary = None
-        for path in chrome_paths:
-            expanded_path = os.path.expandvars(path)
-            if os.path.exists(expanded_path):
-                chrome_binary = expanded_path
-                break
-        
-        if chrome_binary:
-            print(f"Found Chrome binary at: {chrome_binary}")
-            chrome_options.binary_location = chrome_binary
-        else:
-            print("Warning: Could not find Chrome binary in standard locations")
-        
-        # Add required Chrome options
-        chrome_options.add_argument('--no-sandbox')
-        chrome_options.add_argument('--disable-dev-shm-usage')
-        chrome_options.add_argument('--disable-gpu')
-        chrome_options.add_argument('--disable-infobars')
-        chrome_options.add_argument('--disable-extensions')
-        chrome_options.add_argument('--disable-software-rasterizer')
-        
-        try:
-            print("Starting WebDriver setup...")
-            
-            # Get Chrome driver path and create service
-            from selenium.webdriver.chrome.service import Service
-            from webdriver_manager.chrome import ChromeDriverManager
-            
-            # Use specific ChromeDriver version matching your Chrome
-            driver_manager = ChromeDriverManager()
-            driver_path = driver_manager.install()
-            
-            # Ensure we're using the correct chromedriver executable
-            if driver_path.endswith('THIRD_PARTY_NOTICES.chromedriver'):
-                driver_dir = os.path.dirname(driver_path)
-                possible_drivers = [
-                    os.path.join(driver_dir, 'chromedriver.exe'),
-                    os.path.join(driver_dir, 'chromedriver-win32', 'chromedriver.exe'),
-                    os.path.join(driver_dir, 'chromedriver-win64', 'chromedriver.exe')
-                ]
-                
-                for possible_driver in possible_drivers:
-                    if os.path.exists(possible_driver):
-                        driver_path = possible_driver
-                        break
-            
-            print(f"Using ChromeDriver at: {driver_path}")
-            
-            service = Service(executable_path=driver_path)
-            print("Service created successfully")
-            
-            print("Initializing Chrome WebDriver...")
-            self.driver = webdriver.Chrome(service=service, options=chrome_options)
-            
-            self.driver.set_page_load_timeout(30)
-            self.driver.implicitly_wait(10)
-            
-            print("WebDriver setup completed successfully!")
-            
-        except Exception as e:
-            error_msg = str(e)
-            print(f"Error setting up WebDriver: {error_msg}")
-            
-            # Get system information for debugging
-            import platform
-            system_info = f"""
-            System Information:
-            - OS: {platform.system()} {platform.version()}
-            - Python: {platform.python_version()}
-            - Architecture: {platform.architecture()[0]}
-            """
-            
-            troubleshooting_msg = f"""
-            Troubleshooting steps:
-            1. Make sure Google Chrome is installed and up to date
-            2. Try these steps:
-               a. Uninstall Chrome and reinstall the latest version
-               b. Run these commands:
-                  - pip uninstall selenium webdriver-manager
-                  - pip install selenium webdriver-manager --upgrade
-               c. Delete the .wdm folder in your user directory
-            3. System Information: {system_info}
-            """
-            
-            raise Exception(f"Could not initialize WebDriver: {error_msg}\n{troubleshooting_msg}")
+        self._driver = create_chrome_driver()
+
+    def _load_soup(self, url: str, required_marker: Optional[str] = None) -> BeautifulSoup:
+        """Load a page over HTTP, using the browser only for JavaScript-only pages."""
+        html = self.fetcher.get_html(url, required_marker)
+        if html is None:
+            rate_limiter.wait(url)
+            self.driver.get(url)
+            WebDriverWait(self.driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
+            html = self.driver.page_source
+        return BeautifulSoup(html, 'html.parser')
+
     def scrape_and_extract_courses(self):
         """Scrape courses and extract their details"""
         try:
@@ -179,7 +136,6 @@ class CouponScraper:
             print(f"Loading main page: {self.base_url}")
 
             # Initial setup
-            self.driver.maximize_window()
             self.driver.get(self.base_url)
 
             # Setup page
@@ -187,75 +143,79 @@ class CouponScraper:
             self._handle_consent()
             self._configure_page_filters()            
             
+            high_water_mark = HighWaterMark('real.discount')
+            exhausted = False
 
-            while True:
+            while not high_water_mark.reached:
                 course_links = self.driver.find_elements(By.XPATH, "//a[contains(@href, '/offer/')]")
                 print(f"\nFound {len(course_links)} course links")
 
                 self.verify_english_content()
-                    
 
-                for index, link in enumerate(course_links, start=1):
+                offer_urls = []
+                for link in course_links:
                     try:
-                        print(f"\nProcessing course {index}/{len(course_links)}")
-                        # Click the course link
-                        self.driver.execute_script("arguments[0].click();", link)
-                        # Wait for and get article URL
-                        article_url_element = WebDriverWait(self.driver, 10).until(
-                            EC.presence_of_element_located((By.CLASS_NAME, "mt-4"))
-                        )
-                        article_url = article_url_element.get_attribute("href")
-
-                        if article_url:
-                            print(f"Found article URL: {article_url}")
-                            self.driver.get(article_url)
-
-                            # Extract course details
-                            WebDriverWait(self.driver, 10).until(
-                                EC.presence_of_element_located((By.TAG_NAME, "body"))
-                            )
-
-                            article_soup = BeautifulSoup(self.driver.page_source, 'html.parser')
-                            course_details = self._extract_course_details(article_soup, article_url)
-                            #navigate to udemy url to get expiry date
-                            self.driver.get(article_url)
-                            WebDriverWait(self.driver, 20).until(
-                                EC.presence_of_element_located((By.CSS_SELECTOR, "div[data-purpose='discount-expiration']"))
-                            )
-                            # Get expiry date with bold tag
-                            expiry = None
-                            expiry_elem = article_soup.find('div', class_='discount-expiration--discount-expiration--iSt-e')
-                            if expiry_elem:
-                                expiry_text_elem = expiry_elem.find('span', {'data-purpose': 'safely-set-inner-html:discount-expiration:expiration-text'})
-                                if expiry_text_elem and expiry_text_elem.find('b'):
-                                    expiry = expiry_text_elem.get_text(strip=True)
-                                    print(f"Found course with bold expiry tag: {expiry}")
-
-                            if course_details and not self._is_course_processed(course_details):
-                                print(f"Adding new course: {course_details['title']}")
-                                self.courses.append(course_details)
-
-                        # Return to main page
-                        self.driver.back()                        
-                        WebDriverWait(self.driver, 10).until(
-                            EC.presence_of_all_elements_located((By.XPATH, "//a[contains(@href, '/offer/')]"))
-                        )
-
+                        href = link.get_attribute("href")
                     except StaleElementReferenceException:
-                        print(f"Stale element reference encountered for course {index}. Retrying...")
                         continue
-                    except Exception as e:
-                        print(f"Error processing course {index}: {str(e)}")
-                        self.driver.get(self.base_url)
+                    if not href or href in self.course_links:
                         continue
+                    if high_water_mark.is_known(href):
+                        print(f"Reached offers from a previous run at: {href}")
+                        break
+                    self.course_links.add(href)
+                    high_water_mark.record(href)
+                    offer_urls.append(href)
 
-                if not course_links:
+                def extract_offer(driver, offer_url):
+                    try:
+                        return self._extract_offer(driver, offer_url)
+                    except Exception:
+                        high_water_mark.fail(offer_url)
+                        raise
+
+                # Offer pages are extracted concurrently, results come back in listing order
+                print(f"Extracting {len(offer_urls)} offers with {self.driver_pool.size} workers")
+                for course_details in self.driver_pool.map(extract_offer, offer_urls):
+                    if course_details and self._claim_course(course_details):
+                        print(f"Adding new course: {course_details.title}")
+                        self.courses.append(course_details)
+
+                if not offer_urls and not high_water_mark.reached and not self._click_load_more():
                     print("No more courses to process.")
+                    exhausted = True
                     break
 
+            high_water_mark.save(exhausted)
+            self._enrich_expiry()
+            self._process_courses()
+
         except Exception as e:
             print(f"Error in scrape_and_extract_courses: {str(e)}")
-    
+
+    def _extract_offer(self, driver, offer_url: str) -> Optional[Course]:
+        """Extract one offer page with a pooled driver."""
+        rate_limiter.wait(offer_url)
+        driver.get(offer_url)
+        # Wait for and get article URL
+        article_url_element = WebDriverWait(driver, 10).until(
+            EC.presence_of_element_located((By.CLASS_NAME, "mt-4"))
+        )
+        article_url = article_url_element.get_attribute("href")
+        if not article_url:
+            return None
+
+        print(f"Found article URL: {article_url}")
+        rate_limiter.wait(article_url)
+        driver.get(article_url)
+
+        # Extract course details
+        WebDriverWait(driver, 10).until(
+            EC.presence_of_element_located((By.TAG_NAME, "body"))
+        )
+
+        article_soup = BeautifulSoup(driver.page_source, 'html.parser')
+        return self._extract_course_details(article_soup, article_url, driver)
 
     def _click_load_more(self):
         """Click the Load More button if available."""
@@ -265,12 +225,18 @@ class CouponScraper:
             
             # Scroll just above the button to trigger loading but avoid clicking it directly
             self.driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", load_more)
-            time.sleep(2)  # Wait for any animations
+            WebDriverWait(self.driver, 5).until(EC.element_to_be_clickable(load_more))
             
             if load_more.is_displayed() and load_more.is_enabled():
                 print("Clicking Load More button")
+                offer_xpath = "//a[contains(@href, '/offer/')]"
+                offers_before = len(self.driver.find_elements(By.XPATH, offer_xpath))
+                rate_limiter.wait(self.base_url)
                 load_more.click()
-                time.sleep(3)  # Wait for new content to load
+                # Wait for new content to load
+                WebDriverWait(self.driver, 10).until(
+                    lambda d: len(d.find_elements(By.XPATH, offer_xpath)) > offers_before
+                )
                 return True
                 
         except NoSuchElementException:
@@ -281,17 +247,12 @@ class CouponScraper:
 
     def _handle_consent(self):
         """Handle the cookie consent popup."""
-        try:
-            # Wait for consent button
-            consent_button = WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.CLASS_NAME, "fc-button-label"))
-            )
-            print("Found consent button")
-            consent_button.click()
+        # Drivers from the browser service accepted it when they were warmed up
+        if self._consent_accepted:
+            return
+        if accept_consent(self.driver):
             print("Clicked consent button")
-            time.sleep(2)  # Wait for popup to close
-        except Exception as e:
-            print(f"No consent button found or error clicking it: {str(e)}")
+            self._consent_accepted = True
 
 
 
@@ -325,9 +286,10 @@ class CouponScraper:
         print(f"English content verification: {'Passed' if is_english else 'Failed'}")
     
     # Verify English courses using content check
-    def verify_english_content(self):
+    def verify_english_content(self, article_soup: Optional[BeautifulSoup] = None):
         """Verify if the content is in English."""
-        article_soup = BeautifulSoup(self.driver.page_source, 'html.parser')
+        if article_soup is None:
+            article_soup = BeautifulSoup(self.driver.page_source, 'html.parser')
 
         language_indicators = [
             article_soup.find('div', string=re.compile(r'Language.*English', re.IGNORECASE)),
@@ -384,79 +346,81 @@ class CouponScraper:
             print(f"Error extracting course length: {e}")
             return None
 
-    def _extract_course_details(self, article_soup, article_url):
-        """Extract course details from an article."""
-        try:
-            
-
-            # Price check
-            price_elem = article_soup.find('span', class_='ml-1')
-            if not price_elem or price_elem.get_text().strip() != '0':
-                print("Skipping non-free course")
-                return None
-
-            # Get course title
-            title_container = article_soup.find('div', class_='row mt-3')
-            if not title_container or not (link_elem := title_container.find('a')):
-                print("Title container or link not found")
-                return None
-
-            title = link_elem.get_text(strip=True)
-            print(f"Found course: {title}")
-
-            # Get Udemy URL
-            print(f"Getting Udemy URL for: {title}")
-            udemy_url = self._get_udemy_url(article_url)
-            if not udemy_url:
-                print("Failed to get Udemy URL")
-                return None
-
-            # Extract coupon code
-            coupon_code_match = re.search(r'couponCode=([A-Z0-9]+)', article_url)
-            coupon_code = coupon_code_match.group(1) if coupon_code_match else None
-
-            # Extract course length 
-            length_text = self.extract_course_length(article_soup)
-            # Extract remaining days from expiry text
-            expiry_days = None
-            expiry_elem = self.driver.find_element(By.CSS_SELECTOR, 
-                "span[data-purpose='safely-set-inner-html:discount-expiration:expiration-text'] b"
-            )
-
-            if expiry_elem:
-                days_text = expiry_elem.text
-                # Extract just the number from "4 jours"
-                expiry_days = days_text.split()[0]
-                print(f"Days remaining to claim: {expiry_days}")
-
-
-            course_details = {
-                'title': title,
-                'original_price': '0',
-                'current_price': "0",
-                'course_length': length_text,
-                'expired in': expiry_days,
-                'url': udemy_url,
-                'coupon_code': coupon_code
-            }
+    def _extract_course_details(self, article_soup, article_url, driver=None):
+        """Extract course details from an article; raises if the article cannot be read."""
+        driver = driver or self.driver
 
-            print(f"Successfully extracted details for: {title}")
-            return course_details
+        # Price check
+        price_elem = article_soup.find('span', class_='ml-1')
+        if not price_elem or price_elem.get_text().strip() != '0':
+            print("Skipping non-free course")
+            return None
 
-        except Exception as e:
-            print(f"Error extracting course details: {str(e)}")
+        # Get course title
+        title_container = article_soup.find('div', class_='row mt-3')
+        if not title_container or not (link_elem := title_container.find('a')):
+            print("Title container or link not found")
             return None
 
-    def _get_udemy_url(self, course_page_url: str) -> Optional[str]:
-        """Visit the course page and get the Udemy URL."""
+        title = link_elem.get_text(strip=True)
+        print(f"Found course: {title}")
+
+        # Get Udemy URL
+        print(f"Getting Udemy URL for: {title}")
+        udemy_url = self._get_udemy_url(article_url, driver)
+        if not udemy_url:
+            raise ValueError(f"Failed to get Udemy URL for: {title}")
+
+        # The coupon code travels in the Udemy link
+        coupon_code = coupon_from_url(udemy_url)
+
+        # Extract course length 
+        length_text = self.extract_course_length(article_soup)
+
+        course_details = Course(
+            title=title,
+            url=udemy_url,
+            coupon_code=coupon_code,
+            original_price='0',
+            current_price='0',
+            course_length=length_text,
+            category=self._detect_category(title),
+            link=article_url,
+            source='real.discount'
+        )
+
+        print(f"Successfully extracted details for: {title}")
+        return course_details
+
+    def _get_udemy_url(self, course_page_url: str, driver=None) -> Optional[str]:
+        """Get the Udemy URL behind a course page's enroll button."""
+        if cached_url := self.link_resolver.get(course_page_url):
+            return cached_url
+
+        # Read the enroll link from plain HTML and follow its redirects over HTTP
+        html = self.fetcher.get_html(course_page_url, required_marker='btn-lg')
+        if html:
+            enroll_link = BeautifulSoup(html, 'html.parser').select_one('a.btn-lg[href]')
+            if enroll_link:
+                udemy_url = self.link_resolver.resolve(course_page_url, urljoin(course_page_url, enroll_link['href']))
+                if udemy_url:
+                    return udemy_url
+
+        udemy_url = self._get_udemy_url_with_browser(course_page_url, driver or self.driver)
+        if udemy_url:
+            self.link_resolver.remember(course_page_url, udemy_url)
+        return udemy_url
+
+    def _get_udemy_url_with_browser(self, course_page_url: str, driver) -> Optional[str]:
+        """Visit the course page in the browser and follow the enroll button."""
         try:
             # Load the course page
-            self.driver.get(course_page_url)
-            time.sleep(5)  # Initial wait for page load
+            rate_limiter.wait(course_page_url)
+            driver.get(course_page_url)
             
             # Wait for the enroll button
             try:
-                WebDriverWait(self.driver, 10).until(
+                WebDriverWait(driver, 10).until(
                     EC.presence_of_element_located((By.CLASS_NAME, "btn-lg"))
                 )
             except TimeoutException:
@@ -464,32 +428,41 @@ class CouponScraper:
                 return None
             
             # Find and click the enroll button
-            enroll_button = self.driver.find_element(By.CLASS_NAME, "btn-lg")
+            enroll_button = driver.find_element(By.CLASS_NAME, "btn-lg")
             if not enroll_button:
                 print("Enroll button not found")
                 return None
             
             # Click the button
-            self.driver.execute_script("arguments[0].click();", enroll_button)
+            driver.execute_script("arguments[0].click();", enroll_button)
             
             # Wait for the redirect or new window
-            time.sleep(10)  # Give time for redirect/new window
+            try:
+                WebDriverWait(driver, 10).until(
+                    lambda d: len(d.window_handles) > 1 or 'udemy.com' in d.current_url
+                )
+            except TimeoutException:
+                print(f"No redirect after clicking enroll on: {course_page_url}")
             
             # Handle potential new window
-            windows = self.driver.window_handles
+            windows = driver.window_handles
             if len(windows) > 1:
-                self.driver.switch_to.window(windows[-1])
+                driver.switch_to.window(windows[-1])
+                try:
+                    WebDriverWait(driver, 10).until(lambda d: 'udemy.com' in d.current_url)
+                except TimeoutException:
+                    print("New window did not reach Udemy in time")
             
             # Get the current URL which should be the Udemy course page
-            udemy_url = self.driver.current_url
+            udemy_url = driver.current_url
             
             # Clean the URL
             cleaned_url = clean_udemy_url(udemy_url)
             
             # Switch back to the main window if necessary
             if len(windows) > 1:
-                self.driver.close()  # Close the Udemy window
-                self.driver.switch_to.window(windows[0])  # Switch back to main window
+                driver.close()  # Close the Udemy window
+                driver.switch_to.window(windows[0])  # Switch back to main window
             
             return cleaned_url
             
@@ -497,41 +470,9 @@ class CouponScraper:
             print(f"Error getting Udemy URL: {str(e)}")
             return None
 
-    def _detect_category(self, title: str, description: str) -> Optional[str]:
+    def _detect_category(self, title: str, description: str = '') -> Optional[str]:
         """Detect the category of a course based on its title and description."""
-        title_lower = title.lower()
-        desc_lower = description.lower()
-        
-        # Define category keywords
-        category_keywords = {
-            'cybersecurity': ['security', 'cyber', 'hacking', 'penetration testing', 'encryption', 'firewall'],
-            'web_design': ['web design', 'css', 'html', 'ui/ux', 'responsive design'],
-            'backend': ['backend', 'django', 'flask', 'node.js', 'express.js', 'php', 'laravel'],
-            'fullstack': ['full stack', 'fullstack', 'mern', 'mean'],
-            'app_development': ['app development', 'android', 'ios', 'swift', 'kotlin'],
-            'mobile': ['mobile', 'react native', 'flutter', 'ionic'],
-            'cloud': ['aws', 'azure', 'cloud', 'devops', 'docker', 'kubernetes'],
-            'quantum': ['quantum', 'qiskit', 'quantum computing'],
-            'seo': ['seo', 'search engine optimization', 'google analytics'],
-            'software': ['software', 'programming', 'java', 'c++', 'python'],
-            'AI': ['ai', 'artificial intelligence', 'machine learning', 'deep learning', 'neural networks'],
-            'crypto': ['crypto', 'blockchain', 'bitcoin', 'ethereum', 'nft'],
-            'marketing': ['marketing', 'digital marketing', 'social media', 'advertising'],
-            'design': ['design', 'photoshop', 'illustrator', 'graphic design'],
-            'personal_development': ['personal development', 'leadership', 'management', 'productivity']
-        }
-        
-        # Check each category's keywords
-        max_matches = 0
-        best_category = None
-        
-        for category, keywords in category_keywords.items():
-            matches = sum(1 for keyword in keywords if keyword in title_lower or keyword in desc_lower)
-            if matches > max_matches:
-                max_matches = matches
-                best_category = category
-        
-        return best_category if max_matches > 0 else None
+        return category_engine.category_of(title, description)
 
     def process_courses(driver, courses):
         for index, course in enumerate(courses):
@@ -565,152 +506,209 @@ class CouponScraper:
 
         # Group courses by category
         categorized_courses = self._group_courses_by_category(self.courses)
+        # New groups start just below this run, so even with a coarse clock its first courses count as new
+        delivery_start = time.time() - 0.001
 
         for category, courses in categorized_courses.items():
+            # Store the new courses; the store merges them by URL and keeps when each was first seen
+            save_category_cache(category, courses)
+            # Stored, so later runs and the other feeds can skip them
+            for course in courses:
+                self._mark_course_processed(course)
+
             if category not in self.group_ids:
                 continue
 
-            # Load existing courses for this category
-            existing_courses = load_category_cache(category)
+            # Each group only gets the courses stored since its last delivery
+            group = f"{category}@{self.group_ids[category]}"
+            new_courses, cursor = load_undelivered_courses(group, category, delivery_start)
+            if not new_courses:
+                print(f"No new courses for category: {category}")
+                continue
 
-            # Merge new courses with existing ones
-            merged_courses = merge_course_lists(existing_courses, courses)
+            message = format_whatsapp_message(new_courses, category, WHATSAPP_MESSAGE_TEMPLATE)
+            print(f"Sending {len(new_courses)} new courses for category: {category}")
+            # The cursor only moves once the message is out, so a failed send is retried next run
+            if self.send_whatsapp_message(self.group_ids[category], message):
+                mark_delivered(group, cursor)
 
-            # Save updated course list for this category
-            save_category_cache(category, merged_courses)
+    def process_and_send_courses(self):
+        """Scrape the listing over HTTP (falling back to the browser), then store and send the new courses."""
+        listing_html = self.fetcher.get_html(self.base_url, required_marker='/offer/')
+        listing_soup = parse_html(listing_html) if listing_html is not None else None
+        # Cards are filtered by their own language; a listing without any English card goes through the browser
+        if listing_soup is None or not self.verify_english_content(listing_soup):
+            self._process_listing_with_browser()
+        else:
+            self._process_listing_over_http(listing_soup)
+        self._enrich_expiry()
+        self._process_courses()
+
+    def _enrich_expiry(self):
+        """Fill in coupon expiry for all scraped courses over HTTP, in batches."""
+        self.expiry_enricher.enrich_courses(self.courses)
+
+    def _process_listing_over_http(self, listing_soup: BeautifulSoup):
+        """Walk the listing pages as plain HTML, starting from the parsed first page, and scrape each offer page."""
+        high_water_mark = HighWaterMark('real.discount')
+        exhausted = False
+        page = 1
+        while self.scraped_courses < self.max_courses and not high_water_mark.reached:
+            cards = parse_listing_cards(listing_soup, self.base_url)
+            # A page of only paid or non-English cards still leads on to the next page
+            unseen = any(card['link'] not in self.course_links for card in cards)
+            new_cards = self._new_listing_cards(cards, high_water_mark)
+            for card in new_cards:
+                try:
+                    course = self._scrape_offer_over_http(card)
+                except Exception as e:
+                    print(f"Error processing course: {str(e)}")
+                    high_water_mark.fail(card['link'])
+                    continue
+                if course:
+                    self.courses.append(course)
+                    self.scraped_courses += 1
 
-            # Format message with merged courses
-            message = format_whatsapp_message(merged_courses, category, CATEGORIES[category]['template'])
+            if high_water_mark.reached or self.scraped_courses >= self.max_courses:
+                break
+            if not unseen:
+                print("No more courses to load.")
+                exhausted = True
+                break
 
-            if message:
-                print(f"Sending message for category: {category}")
-                self.send_whatsapp_message(self.group_ids[category], message)
+            page += 1
+            listing_html = self.fetcher.get_html(LISTING_PAGE_URL.format(page=page), required_marker='/offer/')
+            if listing_html is None:
+                print("No more listing pages.")
+                exhausted = True
+                break
+            # Parse each listing page once and read all cards from that snapshot
+            listing_soup = parse_html(listing_html)
 
-            # Mark all courses as processed in the main cache
-            for course in courses:
-                self._mark_course_processed(course)
+        high_water_mark.save(exhausted)
+        print(f"Completed scraping {self.scraped_courses} courses.")
 
-    def process_and_send_courses(self):
-        self.driver.get(self.base_url)  # Open the target webpage
-        time.sleep(2)  # Wait for the page to load
-        scraper._handle_consent()  # Handle consent if needed
-        scraper._configure_page_filters()  # Configure page filters
-        # Language check
-        self.verify_english_content()
-
-        while self.scraped_courses < self.max_courses:
-            # Find course elements
-            course_elements = self.driver.find_elements(By.XPATH, "//a[contains(@href, '/offer/')]")        
-            for course_element in course_elements:
-                article_soup = BeautifulSoup(self.driver.page_source, 'html.parser')
-                
-                # Extract course data
-                course_title = course_element.find_element(
-                    By.XPATH,
-                    ".//h3[contains(@class, 'ml-3')]"
-                ).text
-                # Extract old price
-                course_price_old = None
-                if price_old_container := article_soup.find('span', class_='card-price-full'):
-                    course_price_old = price_old_container.get_text(strip=True)
-                    print(f"Original price found: {course_price_old}")
-
-                # Extract new price and validate it's free
-                course_price_new = None
-                # First find the dollar sign icon
-                dollar_icon = article_soup.find('i', class_='fas fa-dollar-sign')
-                if dollar_icon:
-                    # Navigate to price container
-                    price_container = dollar_icon.find_parent('div').find('div', class_='ml-1')
-                    if price_container:
-                        free_price = price_container.find('span')  # Get first span with '0$'
-                        if free_price:
-                            price_text = free_price.get_text(strip=True)
-                            cleaned_price = price_text.replace('$', '').strip()
-                            if cleaned_price == '0':
-                                course_price_new = '0'
-                                print("Confirmed free course")
-
-                                # Extract original price
-                                original_price = price_container.find('span', class_='card-price-full')
-                                if original_price:
-                                    course_price_old = original_price.get_text(strip=True)
-                                    print(f"Original price was: {course_price_old}")
-
-                time_completion = None
-                if duration_container := article_soup.find('div', class_='p-2 text-center'):
-                    if duration_elem := duration_container.find('div', class_='mt-1'):
-                        time_completion = duration_elem.get_text(strip=True)
-                course_category = None
-                if category_container := article_soup.find('div', class_='row'):
-                    if category_elem := category_container.find('div', class_='ml-3'):
-                        course_category = category_elem.get_text(strip=True)
-                
+    def _new_listing_cards(self, cards: List[Dict], high_water_mark: HighWaterMark) -> List[Dict]:
+        """Pick the cards not seen yet, up to max_courses and the high-water mark."""
+        new_cards = []
+        for card in cards:
+            if self.scraped_courses + len(new_cards) >= self.max_courses:
+                print("Reached the maximum number of courses to scrape.")
+                break
+            if card['link'] in self.course_links:
+                continue
+            if high_water_mark.is_known(card['link']):
+                print(f"Reached offers from a previous run at: {card['link']}")
+                break
+            self.course_links.add(card['link'])
+            high_water_mark.record(card['link'])
+            # The HTTP listing is unfiltered, so paid and non-English courses show up alongside the rest
+            if card['current_price'] != '0':
+                print(f"Skipping non-free course: {card['title']}")
+                continue
+            if 'english' not in (card['language'] or '').lower():
+                print(f"Skipping non-English course: {card['title']} ({card['language']})")
+                continue
+            new_cards.append(card)
+        return new_cards
+
+    def _course_from_card(self, card: Dict, coupon_url: str) -> Optional[Course]:
+        """
+        Build a course record from a listing card and its resolved coupon link.
+        Returns None for a course and coupon already collected from any source.
+        """
+        # Affiliate links carry the Udemy URL, so most duplicates are caught before following redirects
+        direct_url = unwrap_affiliate_url(coupon_url)
+        if is_destination(direct_url) and self.processed.contains(direct_url, None):
+            print(f"Skipping course already collected: {card['title']}")
+            return None
 
-                if self.scraped_courses >= self.max_courses:
-                    print("Reached the maximum number of courses to scrape.")
-                    return
+        udemy_url = self.link_resolver.resolve(card['link'], coupon_url) or clean_udemy_url(coupon_url)
+        coupon_code = coupon_from_url(udemy_url)
+
+        # Print to console
+        print(f"Processing course {self.scraped_courses + 1}/{self.max_courses}:")
+        print(f"Title: {card['title']}")
+        print(f"OldPrice: {card['original_price']}")
+        print(f"NewPrice: {card['current_price']}")
+        print(f"Time to complete: {card['course_length']}")
+        print(f"Link scraped: {card['link']}")
+        print(f"Coupon: {coupon_url}\n")
+
+        course = Course(
+            title=card['title'] or '',
+            url=udemy_url,
+            coupon_code=coupon_code,
+            original_price=card['original_price'],
+            current_price=card['current_price'],
+            course_length=card['course_length'],
+            # The listing's own category label helps pick one of ours
+            category=self._detect_category(card['title'] or '', card['category'] or ''),
+            link=card['link'],
+            source='real.discount'
+        )
+        return course if self._claim_course(course) else None
+
+    def _scrape_offer_over_http(self, card: Dict) -> Optional[Course]:
+        """Read a card's offer page without driving the browser; raises if the page cannot be read."""
+        # The offer page holds the coupon link in plain HTML
+        offer_soup = self._load_soup(card['link'], required_marker='mt-4')
+        coupon_element = offer_soup.select_one('div.mt-4 a[target="_blank"]')
+        if not coupon_element or not coupon_element.get('href'):
+            raise ValueError(f"Coupon link not found on offer page: {card['link']}")
+        return self._course_from_card(card, coupon_element['href'])
+
+    def _scrape_offer_with_browser(self, driver, card: Dict) -> Optional[Course]:
+        """Read a card's offer page with a pooled driver."""
+        rate_limiter.wait(card['link'])
+        driver.get(card['link'])
+
+        # Get coupon URL of udemy page
+        coupon_element = WebDriverWait(driver, 10).until(
+            EC.presence_of_element_located((By.XPATH, '//div[@class="mt-4"]//a[@target="_blank"]'))
+        )
+        return self._course_from_card(card, coupon_element.get_attribute('href'))
 
+    def _process_listing_with_browser(self):
+        """Drive the listing in Chrome when it cannot be read as plain HTML."""
+        rate_limiter.wait(self.base_url)
+        self.driver.get(self.base_url)  # Open the target webpage
+        # Wait for the page to load
+        WebDriverWait(self.driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
+        self._handle_consent()  # Handle consent if needed
+        self._configure_page_filters()  # Configure page filters
+
+        high_water_mark = HighWaterMark('real.discount')
+        exhausted = False
+        while self.scraped_courses < self.max_courses and not high_water_mark.reached:
+            # One snapshot of the listing DOM per load, shared by the language check and all cards
+            listing_soup = parse_html(self.driver.page_source)
+            self.verify_english_content(listing_soup)
+
+            def scrape_offer(driver, card):
                 try:
-                    # Extract course information
-                    course_link = course_element.get_attribute("href")
-
-                    if course_link not in self.course_links:
-                        self.course_links.add(course_link)
-                        # Click to open course page
-                        self.driver.execute_script("arguments[0].click();", course_element)
-                        time.sleep(5)
-
-                        # Get coupon URL of udemy page
-                        coupon_element = WebDriverWait(self.driver, 10).until(
-                            EC.presence_of_element_located((By.XPATH, '//div[@class="mt-4"]//a[@target="_blank"]'))
-                        )
-                        coupon_url = coupon_element.get_attribute('href')
-                        # Navigate to coupon URL
-                        self.driver.get(coupon_url)
-                        WebDriverWait(self.driver, 20).until(
-                            EC.presence_of_element_located((By.CSS_SELECTOR, "span[data-purpose='safely-set-inner-html:discount-expiration:expiration-text'] b"))
-                        )
-                        expiry_days = None
-                        expiry_elem = self.driver.find_element(By.CSS_SELECTOR, 
-                        "span[data-purpose='safely-set-inner-html:discount-expiration:expiration-text'] b"
-                        )                    
-                        #article_soup.find('div', class_='discount-expiration--discount-expiration--iSt-e')
-                        if expiry_elem:
-                            days_text = expiry_elem.text
-                            # Extract just the number from "4 jours"
-                            expiry_days = days_text.split()[0]
-                            print(f"Days remaining to claim: {expiry_days}")
-                        # Print to console
-                        print(f"Processing course {self.scraped_courses + 1}/{self.max_courses}:")
-                        print(f"Title: {course_title}")
-                        print(f"OldPrice: {course_price_old}")
-                        print(f"NewPrice: {course_price_new}")
-                        print(f"Time to complete: {time_completion}")
-                        print(f"Link scraped: {course_link}")
-                        print(f"Coupon: {coupon_url}\n")
-                        print(f"expire in: {expiry_days}")
-
-                        self.scraped_courses += 1
-
-                        # Return to main page
-                        self.driver.back()
-                        time.sleep(2)
-
-                except StaleElementReferenceException:
-                    print("Refreshing stale element...")
-                    time.sleep(1)
-                    continue
-
-                except Exception as e:
-                    print(f"Error processing course: {str(e)}")
-                    continue
+                    return self._scrape_offer_with_browser(driver, card)
+                except Exception:
+                    high_water_mark.fail(card['link'])
+                    raise
+
+            # Offer pages open in pooled drivers so the listing (and its Load More state) stays put
+            new_cards = self._new_listing_cards(parse_listing_cards(listing_soup, self.base_url), high_water_mark)
+            for course in self.driver_pool.map(scrape_offer, new_cards):
+                if course:
+                    self.courses.append(course)
+                    self.scraped_courses += 1
+
+            if high_water_mark.reached or self.scraped_courses >= self.max_courses:
+                break
 
             # Try to load more courses
             if not self._click_load_more():
                 print("No more courses to load.")
+                exhausted = True
                 break
 
+        high_water_mark.save(exhausted)
         print(f"Completed scraping {self.scraped_courses} courses.")
 
 
@@ -724,38 +722,52 @@ class CouponScraper:
 
     def cleanup(self):
         """Clean up resources."""
-        self.driver.quit()
+        category_engine.save()
+        self.processed.save()
+        self.link_resolver.save_cache()
+        self.fetcher.close()
+        self.driver_pool.close()
+        if self._driver is not None:
+            if self.browser_service:
+                self.browser_service.release(self._driver)
+            else:
+                self._driver.quit()
+            self._driver = None
 
-    def _is_course_processed(self, course):
+    def _is_course_processed(self, course: Course) -> bool:
         """Check if course is already processed."""
-        url = course.get('url', '')
-        return url in self.cache.get('processed_courses', [])
+        return self.processed.contains(course.url, course.coupon_code)
 
-    def _mark_course_processed(self, course):
-        """Mark course as processed."""
-        url = course.get('url', '')
-        coupon_code = course.get('coupon_code', '')
+    def _claim_course(self, course: Course) -> bool:
+        """Reserve a course for this run; False if it was already collected from any source."""
+        if self.processed.claim(course.url, course.coupon_code):
+            return True
+        print(f"Skipping course already collected: {course.title}")
+        return False
+
+    def _mark_course_processed(self, course: Course) -> bool:
+        """Mark a stored course as processed; False if it was already recorded."""
+        url = course.url
 
         # Create a processed course entry
         processed_course_entry = {
             'url': url,
-            'coupon_code': coupon_code,
-            'udemy_url': course.get('udemy_url', '')
+            'coupon_code': course.coupon_code or '',
+            'source': course.source
         }
 
-        if 'processed_courses' not in self.cache:
-            self.cache['processed_courses'] = []
-
-        # Check if the course is already processed
-        if processed_course_entry not in self.cache['processed_courses']:
-            self.cache['processed _courses'].append(processed_course_entry)
+        # Appended to the processed history with an fsync, so a crash later in the run keeps it
+        if self.processed.add(processed_course_entry):
             print(f"Marked course as processed: {url}")
-        else:
-            print(f"Course already processed: {url}")
+            return True
+        print(f"Course already processed: {url}")
+        return False
 
     def send_whatsapp_message(self, phone_number: str, message: str):
         """Send WhatsApp message using pywhatkit."""
         try:
+            # Keep messages DELAY_BETWEEN_MESSAGES apart
+            rate_limiter.wait('https://web.whatsapp.com/')
             # Get current hour and minute
             now = datetime.now()
             # Add 2 minutes to current time to ensure WhatsApp Web loads
@@ -779,7 +791,7 @@ class CouponScraper:
         """Group courses by their category."""
         grouped_courses = {}
         for course in courses:
-            category = course.get('category', 'Uncategorized')
+            category = course.category or self._detect_category(course.title) or 'Uncategorized'
             if category not in grouped_courses:
                 grouped_courses[category] = []
             grouped_courses[category].append(course)
@@ -787,7 +799,7 @@ class CouponScraper:
     def output_processed_courses(self):
         """Output the processed courses in JSON format."""
         processed_courses_json = {
-            "processed_courses": self.cache.get('processed_courses', [])
+            "processed_courses": list(self.cache.values())
         }
 
         print(json.dumps(processed_courses_json, indent=4))
@@ -0,0 +1,99 @@
+"""The course record passed between the scrapers, the store and the message formatter."""
+import json
+import time
+from datetime import datetime, timedelta
+from operator import attrgetter
+from typing import Dict, Optional
+
+# Formats expiry dates have been stored in
+EXPIRY_DATE_FORMATS = ['%Y-%m-%d', '%B %d, %Y']
+
+
+def expiry_timestamp(expiry_date: Optional[str]) -> Optional[float]:
+    """Return the end of an expiry day as a timestamp, or None if the date cannot be read."""
+    for date_format in EXPIRY_DATE_FORMATS:
+        try:
+            return (datetime.strptime(expiry_date, date_format) + timedelta(days=1)).timestamp()
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+class Course:
+    """
+    One course offer. url is the Udemy course link and link the page the offer
+    was found on; expires_at is the coupon's expiry as a timestamp and
+    expiry_date the same day for display. Slots keep large histories small in memory.
+    """
+
+    __slots__ = (
+        'title', 'url', 'coupon_code', 'original_price', 'current_price',
+        'course_length', 'expiry_date', 'expires_at', 'category', 'link', 'date', 'source'
+    )
+
+    # Keys written by older versions of the scrapers, and the field each one means.
+    # The old 'expired in' key is not read: it held days left, counted from a scrape date never stored.
+    ALIASES = {
+        'udemy_url': 'url',
+        'course_url': 'url',
+        'certification_hours': 'course_length'
+    }
+
+    def __init__(self, title: str = '', url: str = '', coupon_code: Optional[str] = None,
+                 original_price: Optional[str] = None, current_price: Optional[str] = None,
+                 course_length: Optional[str] = None, expiry_date: Optional[str] = None,
+                 expires_at: Optional[float] = None, category: Optional[str] = None,
+                 link: Optional[str] = None, date: Optional[str] = None, source: Optional[str] = None):
+        self.title = title
+        self.url = url
+        self.coupon_code = coupon_code
+        self.original_price = original_price
+        self.current_price = current_price
+        self.course_length = course_length
+        self.expiry_date = expiry_date
+        self.expires_at = expires_at if expires_at is not None else expiry_timestamp(expiry_date)
+        self.category = category
+        self.link = link
+        self.date = date
+        self.source = source
+
+    _values = attrgetter(*__slots__)
+
+    def to_dict(self) -> Dict:
+        return dict(zip(self.__slots__, self._values(self)))
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Course':
+        """Build a course from a stored record, reading legacy keys; unknown keys are dropped."""
+        course = cls.__new__(cls)
+        get = data.get
+        for name in cls.__slots__:
+            setattr(course, name, get(name))
+        if not cls.ALIASES.keys().isdisjoint(data):
+            for legacy, name in cls.ALIASES.items():
+                if get(legacy) and not getattr(course, name):
+                    setattr(course, name, data[legacy])
+        if course.title is None:
+            course.title = ''
+        if course.url is None:
+            course.url = ''
+        if course.expires_at is None and course.expiry_date:
+            course.expires_at = expiry_timestamp(course.expiry_date)
+        return course
+
+    def is_live(self, now: Optional[float] = None) -> bool:
+        """False once the coupon has expired; coupons of unknown expiry count as live."""
+        return self.expires_at is None or self.expires_at > (time.time() if now is None else now)
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), ensure_ascii=False)
+
+    @classmethod
+    def from_json(cls, text: str) -> 'Course':
+        return cls.from_dict(json.loads(text))
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Course) and self._values(self) == other._values(other)
+
+    def __repr__(self) -> str:
+        return f"Course(title={self.title!r}, url={self.url!r}, coupon_code={self.coupon_code!r})"
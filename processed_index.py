@@ -0,0 +1,159 @@
+"""Constant-time index of collected course offers, optionally fronted by an on-disk Bloom filter."""
+import hashlib
+import math
+import os
+import struct
+import threading
+from functools import lru_cache
+from typing import Dict, Iterable, Optional, Set
+
+from canonical import offer_key
+from config import (
+    PROCESSED_BLOOM_CAPACITY,
+    PROCESSED_BLOOM_ERROR_RATE,
+    PROCESSED_BLOOM_FILE,
+    USE_PROCESSED_BLOOM
+)
+from history import History
+from utils import processed_history
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter stored in one file. The header records its size,
+    hash count, how many processed entries it holds and the history offset it covers.
+    """
+
+    HEADER = struct.Struct('<QIQQ')
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+        self.offset = 0
+
+    def _positions(self, key: str) -> Iterable[int]:
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        first, second = struct.unpack('<QQ', digest)
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+    def add(self, key: str) -> None:
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    def load(self, path: str) -> bool:
+        """Read the filter from disk; False if it is missing or was built with other parameters."""
+        if not os.path.exists(path):
+            return False
+        with open(path, 'rb') as f:
+            header = f.read(self.HEADER.size)
+            if len(header) != self.HEADER.size:
+                return False
+            size, hashes, count, offset = self.HEADER.unpack(header)
+            bits = f.read()
+        if size != self.size or hashes != self.hashes or len(bits) != len(self.bits):
+            return False
+        self.bits = bytearray(bits)
+        self.count = count
+        self.offset = offset
+        return True
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        temp_path = path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(self.HEADER.pack(self.size, self.hashes, self.count, self.offset))
+            f.write(self.bits)
+        os.replace(temp_path, path)
+
+
+class ProcessedIndex:
+    """
+    Canonical offer keys (course slug and coupon) in the processed-course history.
+    Lookups binary-search the history's memory-mapped index, so nothing is
+    loaded up front. With a Bloom filter, lookups of courses never seen are
+    answered by the filter alone, without touching the history.
+    Courses collected in this run are claimed in memory; they only reach the
+    history once they are stored, so a run that never stores them loses nothing.
+    """
+
+    def __init__(self, history: History, bloom_file: Optional[str] = None,
+                 bloom_capacity: int = PROCESSED_BLOOM_CAPACITY,
+                 bloom_error_rate: float = PROCESSED_BLOOM_ERROR_RATE):
+        self.history = history
+        self._lock = threading.Lock()
+        self._claimed: Set[str] = set()
+        self.bloom_file = bloom_file
+        self.bloom = None
+        if bloom_file:
+            self.bloom = BloomFilter(bloom_capacity, bloom_error_rate)
+            self._load_bloom()
+
+    def entries(self) -> Iterable[Dict]:
+        """Every processed entry, in the order they were recorded."""
+        return self.history.values()
+
+    def _load_bloom(self) -> None:
+        recorded = len(self.history)
+        if (not self.bloom.load(self.bloom_file) or self.bloom.count > recorded
+                or self.bloom.offset > self.history.end):
+            # Missing, resized or out of step with the history: rebuild from scratch
+            self.bloom.bits = bytearray(len(self.bloom.bits))
+            self.bloom.count = 0
+            self.bloom.offset = 0
+        # The history only ever appends, so only records past the saved offset are read
+        for key in self.history.keys(self.bloom.offset):
+            self.bloom.add(key)
+        if self.bloom.offset != self.history.end:
+            self.bloom.count = recorded
+            self.bloom.offset = self.history.end
+            self.bloom.save(self.bloom_file)
+
+    def contains(self, url: str, coupon_code: Optional[str]) -> bool:
+        """Check whether this course and coupon were already collected, from any source."""
+        return self._contains(offer_key(url, coupon_code))
+
+    def _contains(self, key: str) -> bool:
+        if key in self._claimed:
+            return True
+        if self.bloom is not None and key not in self.bloom:
+            return False
+        return key in self.history
+
+    def claim(self, url: str, coupon_code: Optional[str]) -> bool:
+        """Reserve a course for this run; False if it was already collected, in this run or before."""
+        key = offer_key(url, coupon_code)
+        # Offer pages are scraped by several workers; only one of them may claim a course
+        with self._lock:
+            if self._contains(key):
+                return False
+            self._claimed.add(key)
+        return True
+
+    def add(self, entry: Dict) -> bool:
+        """Record a stored course in the history; False if it was already recorded."""
+        key = offer_key(entry.get('url', ''), entry.get('coupon_code'))
+        with self._lock:
+            if not self.history.add(key, entry):
+                return False
+            if self.bloom is not None:
+                self.bloom.add(key)
+                self.bloom.count += 1
+                self.bloom.offset = self.history.end
+        return True
+
+    def save(self) -> None:
+        """Write the history's offset index and the Bloom filter back to disk."""
+        self.history.reindex()
+        if self.bloom is not None:
+            self.bloom.save(self.bloom_file)
+
+
+@lru_cache(maxsize=1)
+def shared_index() -> ProcessedIndex:
+    """The one dedup index every scraper checks, whatever site it reads."""
+    return ProcessedIndex(processed_history(), PROCESSED_BLOOM_FILE if USE_PROCESSED_BLOOM else None)
@@ -0,0 +1,73 @@
+"""Per-host token-bucket rate limiting shared by every scraper and sender."""
+import asyncio
+import threading
+import time
+from typing import Dict, Tuple
+from urllib.parse import urlparse
+
+from config import HOST_RATE_LIMITS, RATE_LIMIT_BURST, RATE_LIMIT_DELAY
+
+
+class TokenBucket:
+    """Allow `burst` requests at once, refilled at one token every `interval` seconds."""
+
+    def __init__(self, interval: float, burst: int):
+        self.interval = interval
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token and return how long the caller must wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            if self.interval > 0:
+                self.tokens = min(self.burst, self.tokens + (now - self.updated_at) / self.interval)
+            else:
+                self.tokens = self.burst
+            self.updated_at = now
+
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            # The token is borrowed from the future; later callers queue up behind it
+            return -self.tokens * self.interval
+
+
+class RateLimiter:
+    """Hand out request slots per host so that one slow host never delays another."""
+
+    def __init__(self, limits: Dict[str, Tuple[float, int]], default: Tuple[float, int]):
+        self.limits = limits
+        self.default = default
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def _bucket_for(self, url: str) -> TokenBucket:
+        host = urlparse(url).netloc.lower() or url.lower()
+        with self._lock:
+            if host not in self._buckets:
+                interval, burst = self.default
+                for limited_host, limit in self.limits.items():
+                    if host == limited_host or host.endswith('.' + limited_host):
+                        interval, burst = limit
+                        break
+                self._buckets[host] = TokenBucket(interval, burst)
+            return self._buckets[host]
+
+    def wait(self, url: str) -> None:
+        """Block until a request to the URL's host is allowed."""
+        delay = self._bucket_for(url).reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def wait_async(self, url: str) -> None:
+        """Asynchronous version of wait()."""
+        delay = self._bucket_for(url).reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+# Shared instance used by all fetchers and senders
+rate_limiter = RateLimiter(HOST_RATE_LIMITS, (RATE_LIMIT_DELAY, RATE_LIMIT_BURST))
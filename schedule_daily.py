@@ -1,6 +1,7 @@
 import schedule
 import time
 from main import CouponScraper
+from browser_service import BrowserService
 import logging
 from datetime import datetime
 import os
@@ -15,18 +16,21 @@ logging.basicConfig(
     ]
 )
 
+# Warm browsers shared by every scheduled run
+browser_service = BrowserService()
+
 def run_scraper():
     try:
         logging.info("Starting daily coupon scraping...")
-        scraper = CouponScraper()
-        scraper.run()
+        scraper = CouponScraper(browser_service=browser_service)
+        scraper.process_and_send_courses()
         logging.info("Daily coupon scraping completed successfully")
     except Exception as e:
         logging.error(f"Error during scraping: {str(e)}")
     finally:
         # Ensure the driver is closed
-        if 'scraper' in locals() and hasattr(scraper, 'driver'):
-            scraper.driver.quit()
+        if 'scraper' in locals():
+            scraper.cleanup()
 
 def main():
     # Log startup
@@ -39,13 +43,16 @@ def main():
     run_scraper()
     
     # Keep the script running
-    while True:
-        try:
-            schedule.run_pending()
-            time.sleep(60)  # Check every minute
-        except Exception as e:
-            logging.error(f"Scheduler error: {str(e)}")
-            time.sleep(300)  # Wait 5 minutes on error before retrying
+    try:
+        while True:
+            try:
+                schedule.run_pending()
+                time.sleep(60)  # Check every minute
+            except Exception as e:
+                logging.error(f"Scheduler error: {str(e)}")
+                time.sleep(300)  # Wait 5 minutes on error before retrying
+    finally:
+        browser_service.close()
 
 if __name__ == "__main__":
     main()
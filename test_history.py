@@ -0,0 +1,41 @@
+"""Concurrent use of a History: workers look keys up while another one appends and reindexes."""
+import threading
+
+from history import History
+
+
+def test_concurrent_add_and_contains(tmp_path):
+    history = History(str(tmp_path / 'processed.history'), reindex_every=20)
+    history.import_records((f"seed-{i}", i) for i in range(200))
+    errors = []
+    done = threading.Event()
+
+    def read():
+        try:
+            while not done.is_set():
+                for i in range(0, 200, 7):
+                    assert f"seed-{i}" in history
+                    assert history.get(f"seed-{i}") == i
+        except BaseException as e:
+            errors.append(e)
+
+    def write():
+        try:
+            for i in range(500):
+                assert history.add(f"new-{i}", i)
+        except BaseException as e:
+            errors.append(e)
+        finally:
+            done.set()
+
+    threads = [threading.Thread(target=read) for _ in range(3)] + [threading.Thread(target=write)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert len(history) == 700
+    reopened = History(history.path)
+    assert all(f"seed-{i}" in reopened for i in range(200))
+    assert all(reopened.get(f"new-{i}") == i for i in range(500))
@@ -1,117 +1,126 @@
 """Utility functions for the coupon scraper."""
 import json
 import os
+import time
 from datetime import datetime
+from functools import lru_cache
+from urllib.parse import parse_qs, urlparse
 from fake_useragent import UserAgent
 from typing import Dict, List, Optional, Tuple
 
+from category_matrix import get_category_matrix
+from canonical import offer_key
+from config import CACHE_FILE, CATEGORIES, PROCESSED_HISTORY_FILE
+from course_store import get_course_store
+from history import History
+from journal import load_journal
+from keyword_matcher import get_matcher
+from models import Course
+
 
 def get_random_user_agent() -> str:
     """Generate a random user agent string."""
     ua = UserAgent()
     return ua.random
 
-def load_cache() -> Dict:
-    """Load the cache of processed courses."""
-    if os.path.exists('cache/processed_courses.json'):
-        with open('cache/processed_courses.json', 'r') as f:
-            return json.load(f)
-    return {}
+@lru_cache(maxsize=1)
+def processed_history() -> History:
+    """
+    The processed courses, keyed by canonical offer. The first run imports
+    cache/processed_courses.json and its journal.
+    """
+    history = History(PROCESSED_HISTORY_FILE)
+    if not len(history):
+        entries = load_journal(CACHE_FILE).get('processed_courses', [])
+        imported = history.import_records(
+            (offer_key(entry.get('url', ''), entry.get('coupon_code')), entry)
+            for entry in entries if isinstance(entry, dict)
+        )
+        if imported:
+            print(f"Imported {imported} processed courses into {PROCESSED_HISTORY_FILE}")
+    return history
+
+def load_cache() -> History:
+    """Open the processed-course history; records are only decoded when looked up."""
+    return processed_history()
 
-def save_cache(cache: Dict) -> None:
-    """Save the cache of processed courses."""
-    os.makedirs('cache', exist_ok=True)
-    with open('cache/processed_courses.json', 'w') as f:
-        json.dump(cache, f)
+def save_cache(cache: History) -> None:
+    """Write the processed-course history's offset index."""
+    cache.reindex()
 
-def categorize_course(title: str, description: str, categories: Dict) -> Tuple[str, int, List[str]]:
+def categorize_course(title: str, description: str, categories: Dict,
+                      verbose: bool = False) -> Tuple[str, int, List[str]]:
     """
     Categorize a course based on its title and description.
-    Returns a tuple of (category, confidence_score, matching_keywords)
+    Returns a tuple of (category, confidence_score, matching_keywords);
+    the decision is only printed when verbose is set.
     """
-    title_desc = (title + ' ' + description).lower()
-    words = set(title_desc.split())
-    
-    # Store matches with their confidence scores
-    matches = []
-    
-    for category, data in categories.items():
-        score = 0
-        matched_keywords = []
-        
-        # Check exact keyword matches (highest priority)
-        for keyword in data['keywords']:
-            if keyword in title_desc:
-                score += 3
-                matched_keywords.append(keyword)
-        
-        # Check word-level matches (medium priority)
-        for keyword in data['keywords']:
-            keyword_words = set(keyword.split())
-            if keyword_words & words:  # intersection
-                score += len(keyword_words & words)
-                matched_keywords.extend(list(keyword_words & words))
-        
-        # Title has more weight than description
-        title_lower = title.lower()
-        for keyword in data['keywords']:
-            if keyword in title_lower:
-                score += 2
-                
-        if score > 0:
-            matches.append((category, score, matched_keywords))
+    # Keywords are matched in one pass by an automaton compiled once per category table
+    matches = get_matcher(categories).score(title, description)
     
     # Sort matches by score in descending order
     matches.sort(key=lambda x: x[1], reverse=True)
     
     if matches:
         best_match = matches[0]
-        # Log the categorization decision
-        print(f"Course: {title}")
-        print(f"Categorized as: {best_match[0]}")
-        print(f"Confidence score: {best_match[1]}")
-        print(f"Matching keywords: {', '.join(best_match[2])}")
+        if verbose:
+            # Log the categorization decision
+            print(f"Course: {title}")
+            print(f"Categorized as: {best_match[0]}")
+            print(f"Confidence score: {best_match[1]}")
+            print(f"Matching keywords: {', '.join(best_match[2])}")
         return best_match
     
     # If no matches found, return 'other' with 0 confidence
     return ('other', 0, [])
 
+def categorize_courses(titles: List[str], descriptions: List[str],
+                       categories: Optional[Dict] = None) -> List[Tuple[str, int, List[str]]]:
+    """
+    Categorize a whole batch of courses at once; titles and descriptions must be the same length.
+    Returns one (category, confidence_score, matching_keywords) tuple per course,
+    the same as categorize_course gives for each. Only modestly faster than a
+    categorize_course loop (10-25% on 200k titles), as keyword hits are still found one by one.
+    """
+    return get_category_matrix(CATEGORIES if categories is None else categories).categorize(titles, descriptions)
+
 def clean_udemy_url(url: str) -> str:
     """Extract clean Udemy URL from linksynergy or other affiliate links."""
     if 'linksynergy.com' in url:
         try:
-            # Find the actual URL after 'murl=' or 'url='
-            for param in ['murl=', 'url=']:
-                if param in url:
-                    clean_url = url.split(param)[1]
-                    # Remove any additional parameters
-                    if '&' in clean_url:
-                        clean_url = clean_url.split('&')[0]
-                    return clean_url
+            # Find the actual URL in the 'murl' or 'url' parameter (already URL-decoded)
+            query = parse_qs(urlparse(url).query)
+            for param in ['murl', 'url']:
+                if query.get(param):
+                    return query[param][0]
         except Exception as e:
             print(f"Error cleaning linksynergy URL: {str(e)}")
     return url
 
 
-def format_whatsapp_message(courses: List[Dict], category: str, template: str) -> str:
+def format_whatsapp_message(courses: List[Course], category: str, template: str) -> str:
     print(f"Formatting message for category: {category}")  # Debug print
+    # Never announce a coupon that has already expired
+    now = time.time()
+    courses = [course for course in courses if course.is_live(now)]
     print(f"Number of courses: {len(courses)}")  # Debug print
     courses_text = []
     
     for i, course in enumerate(courses, 1):
         print(f"Processing course {i}: {course}")  # Debug print
-        title = course['title'].replace('µ', '')
-        hours_text = f"• Duration: {course['certification_hours']} hours\n" if course['certification_hours'] else ""
-        price_text = f"• Price: {course['original_price']} → Free with coupon\n"
-        expiry_text = f"• Expires: {course['expiry_date']}\n" if course['expiry_date'] else ""
+        title = course.title.replace('µ', '')
+        hours_text = f"• Duration: {course.course_length}\n" if course.course_length else ""
+        price_text = f"• Price: {course.original_price} → Free with coupon\n"
+        expiry_text = f"• Expires: {course.expiry_date}\n" if course.expiry_date else ""
+        coupon_text = f"• Coupon Code: {course.coupon_code}\n" if course.coupon_code else ""
         
         course_text = (
             f"{i}. *{title}*\n"
             f"{price_text}"
             f"{hours_text}"
             f"{expiry_text}"
-            f"• Coupon Code: {course['coupon_code']}\n"
-            f"• URL: {course['udemy_url']}\n"
+            f"{coupon_text}"
+            f"• URL: {course.url}\n"
         )
         courses_text.append(course_text)
     
@@ -138,43 +147,37 @@ def parse_expiry_date(date_str: Optional[str]) -> Optional[str]:
     except ValueError:
         return date_str
 
-def load_category_cache(category: str) -> List[Dict]:
-    """Load the cache for a specific category."""
-    cache_dir = 'cache/categories'
-    os.makedirs(cache_dir, exist_ok=True)
-    cache_file = os.path.join(cache_dir, f"{category}.json")
-    
-    if os.path.exists(cache_file):
-        with open(cache_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return []
-
-def save_category_cache(category: str, courses: List[Dict]) -> None:
-    """Save courses for a specific category."""
-    cache_dir = 'cache/categories'
-    os.makedirs(cache_dir, exist_ok=True)
-    cache_file = os.path.join(cache_dir, f"{category}.json")
-    
-    # Sort courses by expiry date and title
-    sorted_courses = sorted(
-        courses,
-        key=lambda x: (
-            parse_expiry_date(x.get('expiry_date', None)) or datetime.max,
-            x.get('title', '').lower()
-        )
-    )
-    
-    with open(cache_file, 'w', encoding='utf-8') as f:
-        json.dump(sorted_courses, f, indent=2, ensure_ascii=False)
+def load_category_cache(category: str) -> List[Course]:
+    """Load the live courses of a category, soonest expiry first."""
+    return [Course.from_dict(course) for course in get_course_store().category_courses(category)]
+
+def save_category_cache(category: str, courses: List[Course]) -> None:
+    """Store courses under a category, updating the ones already stored and evicting expired ones."""
+    store = get_course_store()
+    store.upsert_many([course.to_dict() for course in courses], category)
+    store.evict_expired()
+
+def load_undelivered_courses(group: str, category: str, start: float) -> Tuple[List[Course], float]:
+    """Load the live courses of a category not yet sent to a group, and the group's next cursor."""
+    courses, cursor = get_course_store().undelivered(group, category, start)
+    return [Course.from_dict(course) for course in courses], cursor
+
+def mark_delivered(group: str, cursor: float) -> None:
+    """Move a group's delivery cursor past the courses just sent."""
+    get_course_store().advance_cursor(group, cursor)
 
-def merge_course_lists(existing_courses: List[Dict], new_courses: List[Dict]) -> List[Dict]:
-    """Merge two course lists, removing duplicates based on URL."""
+def merge_course_lists(existing_courses: List[Course], new_courses: List[Course]) -> List[Course]:
+    """Merge two course lists, removing duplicates based on URL and expired coupons."""
+    now = time.time()
     # Create a dictionary of existing courses using URL as key
-    existing_dict = {course['url']: course for course in existing_courses}
+    existing_dict = {course.url: course for course in existing_courses if course.is_live(now)}
     
     # Update with new courses, overwriting if same URL exists
     for course in new_courses:
-        existing_dict[course['url']] = course
+        if course.is_live(now):
+            existing_dict[course.url] = course
+        else:
+            existing_dict.pop(course.url, None)
     
     # Convert back to list
     return list(existing_dict.values())